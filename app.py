@@ -1,25 +1,41 @@
 # app.py - FinSight Pro (Final: single global year filter in TOP BAR)
 import streamlit as st
 import pandas as pd
-import pdfplumber
-import re
-import plotly.express as px
 import numpy as np
-from io import BytesIO
-
-# ML imports
-from sklearn.ensemble import IsolationForest
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-
-# Optional PDF generation (reportlab)
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.units import mm
-    REPORTLAB_AVAILABLE = True
-except Exception:
-    REPORTLAB_AVAILABLE = False
+import os
+import json
+import hashlib
+import shutil
+from concurrent.futures import TimeoutError as JobTimeoutError
+from functools import partial
+
+from finsight.classify import INCOME_KEYWORDS
+from finsight.ingest import load_ledger
+from finsight.schema import expand_months
+from finsight.anomaly import AnomalyScoreCache, anomaly_table, label_anomalies, MIN_ROWS as ANOMALY_MIN_ROWS
+from finsight.clustering import TransactionClusterer, cluster_months
+from finsight.profiling import StageProfiler
+from finsight.transactions import PAGE_SIZES, TransactionTable
+from finsight.store import ARROW_AVAILABLE, LedgerStore
+from finsight.ledger import RunningLedger
+from finsight.jobs import JobBoard
+from finsight.results import ResultCache
+from finsight.trends import ROLLING_WINDOWS, MonthlyStats
+from finsight.search import TokenIndex, tokenize
+from finsight.recurring import detect_recurring
+from finsight.categorize import CategoryModel, categorize, enough_labels, train_categorizer, unlabelled_mask
+from finsight.forecast import DEFAULT_HORIZON, FORECAST_HORIZONS, forecast_cashflow, forecast_categories
+from finsight.exports import ExportCache, csv_bytes, xlsx_bytes
+from finsight.downsample import (
+    CHART_MAX_POINTS, CHART_POINT_BUDGETS, WEBGL_MIN_POINTS, downsample_groups, downsample_line, render_mode, window,
+)
+from finsight.reports import (
+    headline_metrics, insights_table, monthly_summary, monthly_summary_export, overview_snapshot, pct_change_str,
+)
+from finsight.aggregates import (
+    build_cube, slice_year, net_by,
+    category_abs_totals, months_available, slice_months,
+)
 
 st.set_page_config(page_title="FinSight Pro", layout="wide")
 
@@ -75,163 +91,385 @@ st.markdown(
 )
 
 # ------------------------- Utilities -------------------------
-def extract_transactions_from_pdf(file):
-    transactions = []
-    pattern = re.compile(r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})|\d+(?:\.\d{2}))")
+def load_uploaded_ledger(file):
+    # normalized + classified frame, or None (with the reason shown) if the file can't be read
+    bar = st.progress(0.0, text="Reading statement...")
     try:
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if not text:
-                    continue
-                for line in text.split("\n"):
-                    parts = line.split()
-                    if len(parts) < 2:
-                        continue
-                    m = pattern.search(line.replace("■", ""))
-                    if not m:
-                        continue
-                    amt_str = m.group(1).replace(",", "")
-                    try:
-                        amount = float(amt_str)
-                    except:
-                        continue
-                    date_match = re.search(r"(20\d{2}-\d{2}-\d{2})", line) \
-                                 or re.search(r"(\d{2}/\d{2}/20\d{2})", line) \
-                                 or re.search(r"(\d{2}-\d{2}-20\d{2})", line)
-                    if not date_match:
-                        continue
-                    date_raw = date_match.group(1)
-                    try:
-                        date = pd.to_datetime(date_raw, dayfirst=False, errors='coerce')
-                        if pd.isna(date):
-                            date = pd.to_datetime(date_raw, dayfirst=True, errors='coerce')
-                    except:
-                        date = None
-                    if date is None or pd.isna(date):
-                        continue
-                    date = date.strftime("%Y-%m-%d")
-                    category = parts[-1] if len(parts) >= 2 else "Uncategorized"
-                    desc = " ".join(parts[1:-1]) if len(parts) > 2 else ""
-                    transactions.append({"date": date, "description": desc, "amount": amount, "category": category})
+        return load_ledger(
+            file, income_keywords=INCOME_KEYWORDS, compact=COMPACT_SCHEMA,
+            pdf_progress=lambda done, total: bar.progress(done / total, text=f"Parsed {done}/{total} pages"),
+            profiler=profiler,
+        )
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
-        st.error("PDF parsing error: " + str(e))
-    return pd.DataFrame(transactions)
-
-
-def process_uploaded_file(file):
-    fname = file.name.lower()
-    if fname.endswith(".csv"):
-        df = pd.read_csv(file)
-    elif fname.endswith(".xlsx") or fname.endswith(".xls"):
-        df = pd.read_excel(file)
-    elif fname.endswith(".pdf"):
-        df = extract_transactions_from_pdf(file)
-    else:
-        st.error("Unsupported file type.")
-        return None
+        st.error("Unable to read file: " + str(e))
+    finally:
+        bar.empty()
+    return None
 
-    df.columns = df.columns.str.lower().str.strip()
-    date_cols = ["date", "transaction_date", "timestamp", "time"]
-    amt_cols = ["amount", "amt", "value", "txn_amount", "debit", "credit"]
-    desc_cols = ["description", "details", "remark", "narration", "desc"]
-    cat_cols = ["category", "type", "label", "tag"]
 
-    def find_col(possible):
-        for c in df.columns:
-            if c in possible:
-                return c
-        return None
+def chart_detail(frame, key, x="date"):
+    # point budget + date zoom for charts too large to send whole (hidden for small data);
+    # zooming re-downsamples the window, so detail increases as the range narrows
+    if len(frame) <= CHART_MAX_POINTS:
+        return frame, CHART_MAX_POINTS
+    with st.expander("Chart detail (large dataset)"):
+        budget = st.select_slider("Max points per chart", options=CHART_POINT_BUDGETS, value=CHART_MAX_POINTS, key=f"{key}_budget")
+        lo, hi = frame[x].min().date(), frame[x].max().date()
+        if lo < hi:
+            lo, hi = st.slider("Zoom (date range)", min_value=lo, max_value=hi, value=(lo, hi), key=f"{key}_zoom")
+    return window(frame, x, lo, hi), budget
 
-    dcol = find_col(date_cols)
-    acol = find_col(amt_cols)
-    scol = find_col(desc_cols)
-    ccol = find_col(cat_cols)
 
-    if dcol is None or acol is None:
-        st.error("Couldn't detect required columns (date/amount). Use a CSV/XLSX with 'date' and 'amount' or upload a statement PDF.")
+def df_to_csv_bytes(df):
+    return csv_bytes(df)
+
+
+def df_to_excel_bytes(sheets: dict):
+    try:
+        return xlsx_bytes(sheets)
+    except Exception:
         return None
 
-    out = pd.DataFrame()
-    out["date"] = pd.to_datetime(df[dcol], errors="coerce")
-    out["amount"] = pd.to_numeric(df[acol].astype(str).str.replace(",", ""), errors="coerce")
-    out["description"] = df[scol].astype(str) if scol else "N/A"
-    out["category"] = df[ccol].astype(str) if ccol else "Uncategorized"
-    out = out.dropna(subset=["date", "amount"])
-    out["month"] = out["date"].dt.to_period("M")
-    out["year"] = out["date"].dt.year
-    return out.reset_index(drop=True)
 
+# ------------------------- Exports -------------------------
+# Download payloads are cached process-wide by dataset hash + view parameters.
+# Small ones are built right away; large ones only after "Prepare" is clicked.
+EAGER_EXPORT_MAX_ROWS = 5_000
 
-# ------------------------- Transaction Classification -------------------------
-def classify_transactions(df):
-    income_keywords = [
-        "salary", "income", "refund", "profit", "credit",
-        "interest", "cashback", "deposit", "received"
-    ]
 
-    df = df.copy()
-    df['desc_clean'] = df['description'].astype(str).str.lower()
-    df['cat_clean']  = df['category'].astype(str).str.lower()
+@st.cache_resource
+def shared_export_cache():
+    return ExportCache()
 
-    df['is_income'] = df['desc_clean'].apply(lambda x: any(k in x for k in income_keywords)) | \
-                      df['cat_clean'].apply(lambda x: any(k in x for k in income_keywords))
 
-    def compute_actual_amount(row):
-        amt = row['amount']
-        if pd.isna(amt):
-            return 0.0
-        if row['is_income']:
-            return abs(amt)
-        return -abs(amt)
+def export_button(label, build, file_name, params=(), rows=0):
+    cache = shared_export_cache()
+    key = (dataset_key, file_name, params)
+    data = cache.get(key)
+    if data is None and rows <= EAGER_EXPORT_MAX_ROWS:
+        data = cache.put(key, build())
+    elif data is None:
+        if not st.button(f"Prepare {label} ({rows:,} rows)", key=f"prepare_{file_name}"):
+            return
+        with st.spinner(f"Building {label}..."):
+            data = cache.put(key, build())
+        if data is None:
+            st.caption(f"{label} is not available for this data.")
+    if data is not None:
+        st.download_button(f"Download {label}", data, file_name=file_name)
 
-    df['actual_amount'] = df.apply(compute_actual_amount, axis=1)
-    return df
 
+# ------------------------- Background ML jobs -------------------------
+# Model fits run on a per-session JobBoard (deduplicated per dataset/year/params). Short jobs
+# are waited for inline; longer ones leave a placeholder in their tab that polls and reruns
+# the app when the result is ready, so the other tabs stay usable meanwhile.
+ML_INLINE_WAIT_SECONDS = 1.0
+ML_POLL_SECONDS = 1.0
 
-def df_to_csv_bytes(df):
-    b = BytesIO()
-    df.to_csv(b, index=False)
-    return b.getvalue()
 
+def job_result(future, message):
+    # the job's result, or None while it runs (placeholder shown) or if it failed (error shown;
+    # the board drops failed jobs, so the next rerun retries)
+    try:
+        return future.result(timeout=ML_INLINE_WAIT_SECONDS)
+    except JobTimeoutError:
+        pass
+    except Exception as e:
+        st.error(f"{message} failed: {e}")
+        return None
+    if not hasattr(st, "fragment"):
+        # Streamlit without fragments: wait in the script run, as before
+        with st.spinner(message):
+            try:
+                return future.result()
+            except Exception as e:
+                st.error(f"{message} failed: {e}")
+                return None
+
+    @st.fragment(run_every=ML_POLL_SECONDS)
+    def placeholder():
+        if future.done():
+            st.rerun()
+        st.info(f"⏳ {message} — running in the background; this tab fills in when it's done.")
+
+    placeholder()
+    return None
+
+
+# ------------------------- Upload Cache -------------------------
+# Parsed + classified uploads, merged ledgers, year views and anomaly scores live in one
+# process-wide result cache (memory budget, LRU + TTL eviction) shared by every session,
+# keyed by a hash of the file bytes and the classifier config, so widget reruns and other
+# analysts opening the same statement skip the work entirely. With FINSIGHT_CACHE_DIR set,
+# uploads are also kept on disk as a year/month-partitioned Parquet ledger store (and model
+# scores as result files): a ledger found on disk loads only its cube; transactions are
+# read one year's partitions at a time when a view needs them.
+UPLOAD_CACHE_SCHEMA = 4  # bump when the cached frame layout changes
+UPLOAD_CACHE_DIR = os.environ.get("FINSIGHT_CACHE_DIR", "")
+# On request, uncategorized rows are labelled by a model trained on the ledger's labelled rows.
+# Only with FINSIGHT_CATEGORIZER_MODEL set is the last trained model saved there and used for
+# ledgers with too few labels (everyone sharing the path shares the model)
+CATEGORIZER_MODEL_PATH = os.environ.get("FINSIGHT_CATEGORIZER_MODEL", "")
+# Compact schema: categorical category, int16 year, int32 month ordinal, no helper columns
+COMPACT_SCHEMA = os.environ.get("FINSIGHT_COMPACT", "1") != "0"
+
+
+def classifier_config():
+    return {"schema": UPLOAD_CACHE_SCHEMA, "compact": COMPACT_SCHEMA, "income_keywords": list(INCOME_KEYWORDS)}
+
+
+@st.cache_resource
+def shared_results():
+    return ResultCache(cache_dir=UPLOAD_CACHE_DIR)
+
+
+def upload_cache_key(data, config):
+    h = hashlib.sha256(data)
+    h.update(json.dumps(config, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def ledger_store(key):
+    if not (UPLOAD_CACHE_DIR and ARROW_AVAILABLE):
+        return None
+    return LedgerStore(os.path.join(UPLOAD_CACHE_DIR, key))
 
-def df_to_excel_bytes(sheets: dict):
-    b = BytesIO()
+
+def read_disk_cache(key):
+    # only the cube is loaded here; see ledger_view for the transactions
+    store = ledger_store(key)
+    if store is None or not store.exists():
+        return None
     try:
-        with pd.ExcelWriter(b, engine="xlsxwriter") as writer:
-            for name, df in sheets.items():
-                df.to_excel(writer, sheet_name=name[:31], index=False)
-        b.seek(0)
-        return b.getvalue()
+        return store.read_cube()
     except Exception:
         return None
 
 
+def write_disk_cache(key, df, cube):
+    store = ledger_store(key)
+    if store is None:
+        return
+    try:
+        # the store only counts as present once append() commits its manifest
+        store.write_cube(cube)
+        store.append(df)
+    except Exception:
+        # the disk tier is best-effort; the in-memory result is still used
+        shutil.rmtree(store.root, ignore_errors=True)
+
+
+def parse_transactions(file, key):
+    # (df, cube) for an upload missing from the result cache, or None if it can't be read
+    with profiler.stage("disk cache read"):
+        cube = read_disk_cache(key)
+    if cube is not None:
+        return None, cube
+    df = load_uploaded_ledger(file)
+    if df is None or df.empty:
+        return None  # failed parses are not cached
+    with profiler.stage("cube"):
+        cube = build_cube(df)
+    with profiler.stage("disk cache write"):
+        write_disk_cache(key, df, cube)
+    return df, cube
+
+
+def load_transactions(file):
+    # returns (df, cube, key); df is None when the ledger was found in the disk store
+    with profiler.stage("hash upload"):
+        key = upload_cache_key(file.getvalue(), classifier_config())
+    df, cube = shared_results().get_or_compute(("upload", key), lambda: parse_transactions(file, key)) or (None, None)
+    return df, cube, key
+
+
+def ledger_view(df, key, year):
+    # transactions for the year filter: in-memory ledgers are filtered directly, stored
+    # ledgers read only that year's partitions (shared through the result cache)
+    if df is not None:
+        return df if year is None else df[df["year"] == year]
+    with profiler.stage("ledger store read"):
+        return shared_results().get_or_compute(("ledger view", key, year), lambda: ledger_store(key).read(year))
+
+
+def merge_statements(loaded):
+    # loaded: [(name, df, cube, key)] in upload order; returns (df, cube, key, duplicates skipped).
+    # One statement is used as is; several are merged into a running ledger that only takes in
+    # the statements added since the last rerun (or taken whole from the result cache)
+    if len(loaded) == 1:
+        return loaded[0][1:] + (0,)
+    keys = [key for _, _, _, key in loaded]
+    merged_key = hashlib.sha256("+".join(keys).encode()).hexdigest()
+    merged = shared_results().get(("merged", merged_key))
+    if merged is not None:
+        return merged[:2] + (merged_key, merged[2])
+    ledger = st.session_state.get("running_ledger")
+    if ledger is None or ledger.parts != keys[:len(ledger.parts)]:
+        ledger = RunningLedger()  # a statement was removed or reordered: start over
+    with profiler.stage("merge"):
+        for _, file_df, file_cube, key in loaded[len(ledger.parts):]:
+            ledger.add(file_df if file_df is not None else ledger_store(key).read(), key, file_cube)
+    st.session_state.running_ledger = ledger
+    duplicates = sum(s["duplicates"] for s in ledger.stats)
+    shared_results().put(("merged", merged_key), (ledger.df, ledger.cube, duplicates))
+    return ledger.df, ledger.cube, merged_key, duplicates
+
+
+def full_ledger(df, key):
+    # every transaction of the ledger, read from its store if it was found on disk
+    if df is not None:
+        return df
+    return shared_results().get_or_compute(("ledger view", key, None), lambda: ledger_store(key).read())
+
+
+def ledger_categorizer(df, key):
+    # CategoryModel trained on the ledger's labelled rows (shared, and saved as the categorizer
+    # for ledgers with too few labels when FINSIGHT_CATEGORIZER_MODEL is set)
+    def train():
+        model = train_categorizer(full_ledger(df, key))
+        if model is not None and CATEGORIZER_MODEL_PATH:
+            model.save(CATEGORIZER_MODEL_PATH)
+        return model
+
+    with profiler.stage("train categorizer"):
+        return shared_results().get_or_compute(("categorizer", key), train)
+
+
+def categorize_ledger(df, cube, key):
+    # (df, cube, key, rows filled, model source) with uncategorized rows' categories predicted (shared
+    # through the result cache), or None if there is no model: the ledger has too few labelled rows
+    # and no categorizer was saved
+    if enough_labels(cube["category"], cube["count"]):
+        stamp, source = "ledger", "this ledger's categorized transactions"
+    elif CATEGORIZER_MODEL_PATH and os.path.exists(CATEGORIZER_MODEL_PATH):
+        stamp, source = os.path.getmtime(CATEGORIZER_MODEL_PATH), "the saved categorizer"
+    else:
+        return None
+    categorized_key = hashlib.sha256(f"{key}:categorized:{stamp}".encode()).hexdigest()
+
+    def compute():
+        model = ledger_categorizer(df, key) if stamp == "ledger" else CategoryModel.load(CATEGORIZER_MODEL_PATH)
+        ledger = full_ledger(df, key)
+        with profiler.stage("categorize"):
+            categorized, filled = categorize(ledger, model)
+        if not filled:
+            return None, None, key, 0, source
+        return categorized, build_cube(categorized), categorized_key, filled, source
+
+    return shared_results().get_or_compute(("categorized", categorized_key), compute)
+
+
+def ledger_search_index(df, key, year=None):
+    # TokenIndex over ledger_view(df, key, year)'s rows, built once and shared through the result cache
+    return shared_results().get_or_compute(("search index", key, year), lambda: TokenIndex(df))
+
+
+def search_ledger(df, cube, key, query):
+    # (df, cube, key) of the transactions matching query, found through the ledger's token index
+    # (built once, shared through the result cache), or None if none match
+    results = shared_results()
+    df = full_ledger(df, key)
+    with profiler.stage("search"):
+        index = ledger_search_index(df, key)
+        rows = index.search(query)
+    if not len(rows):
+        return None
+    if len(rows) == len(df):
+        return df, cube, key
+    search_key = hashlib.sha256(f"{key}:search:{' '.join(tokenize(query))}".encode()).hexdigest()
+    found = df.iloc[rows]
+    return found, results.get_or_compute(("cube", search_key), lambda: build_cube(found)), search_key
+
+
+# ------------------------- Diagnostics (per-stage profiling) -------------------------
+# Every rerun is timed stage by stage into a per-session profiler; the diagnostics panel
+# (sidebar, end of script) is hidden unless FINSIGHT_DIAGNOSTICS=1 or the URL has ?diagnostics=1.
+DIAGNOSTICS_ENABLED = os.environ.get("FINSIGHT_DIAGNOSTICS", "") == "1" or st.query_params.get("diagnostics") == "1"
+if "profiler" not in st.session_state:
+    st.session_state.profiler = StageProfiler()
+profiler = st.session_state.profiler
+profiler.trace_memory = DIAGNOSTICS_ENABLED and st.session_state.get("diag_trace_memory", False)
+profiler.start_run()
+
 # ------------------------- File Upload UI -------------------------
 with st.container():
     st.markdown("<div class='glass-sm' style='margin-top:12px;padding:12px;'>", unsafe_allow_html=True)
-    uploaded = st.file_uploader("Upload bank statement (PDF / CSV / XLSX)", type=["pdf", "csv", "xlsx"])
+    uploaded = st.file_uploader("Upload bank statements (PDF / CSV / XLSX) — add more to merge them into one ledger",
+                                type=["pdf", "csv", "xlsx"], accept_multiple_files=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 if not uploaded:
     st.info("Upload a file to start. Use the sample dataset if you want to test quickly.")
     st.stop()
 
-df = process_uploaded_file(uploaded)
-if df is None or df.empty:
+# charts only appear once a statement is loaded, so the uploader renders without waiting for plotly
+import plotly.express as px  # noqa: E402
+
+loaded = []
+with profiler.stage("load"):
+    for file in uploaded:
+        file_df, file_cube, file_key = load_transactions(file)
+        if file_cube is not None:
+            loaded.append((file.name, file_df, file_cube, file_key))
+        elif len(uploaded) > 1:
+            st.warning(f"No transactions detected in {file.name}; it was left out.")
+profiler.context = {"file": ", ".join(f.name for f in uploaded), "bytes": sum(f.size for f in uploaded),
+                    "rows": sum(int(c["count"].sum()) for _, _, c, _ in loaded)}
+if not loaded:
     st.error("No transactions detected. Check file format or column names.")
     st.stop()
 
-df = classify_transactions(df)
+df, cube, dataset_key, duplicates = merge_statements(loaded)
+if len(loaded) > 1:
+    st.caption(f"Merged {len(loaded)} statements: {len(df):,} transactions, "
+               f"{duplicates:,} overlapping duplicates skipped.")
 
 # ensure month/year
-if "month" not in df.columns:
+if df is not None and "month" not in df.columns:
     df["month"] = df["date"].dt.to_period("M")
-if "year" not in df.columns:
+if df is not None and "year" not in df.columns:
     df["year"] = df["date"].dt.year
 
+# ------------------------- Auto-categorization -------------------------
+# opt-in: rows without a usable category get one learned from the labelled rows (see
+# finsight/categorize.py); nothing is trained or saved unless the box is ticked
+uncategorized_rows = int(cube["count"][unlabelled_mask(cube["category"])].sum())
+if uncategorized_rows and st.checkbox(f"🏷️ Predict categories for {uncategorized_rows:,} uncategorized transactions",
+                                      value=False, key="auto_categorize",
+                                      help="Predicted categories replace 'Uncategorized' in every view and export."):
+    categorized = categorize_ledger(df, cube, dataset_key)
+    if categorized is None:
+        st.caption("Too few categorized transactions to learn categories from"
+                   + ("; teach the saved categorizer from a labelled statement first." if CATEGORIZER_MODEL_PATH else "."))
+    elif categorized[3]:
+        df, cube, dataset_key, filled, source = categorized
+        st.caption(f"Predicted categories for {filled:,} of {uncategorized_rows:,} uncategorized transactions "
+                   f"(learned from {source}).")
+    else:
+        st.caption("No confident category predictions for the uncategorized transactions.")
+elif (not uncategorized_rows and CATEGORIZER_MODEL_PATH and enough_labels(cube["category"], cube["count"])
+      and st.button("🏷️ Teach the saved categorizer from this statement's categories", key="teach_categorizer")):
+    # a fully categorized ledger only trains the shared model when asked to
+    if ledger_categorizer(df, dataset_key) is not None:
+        st.caption("Saved categorizer updated; it now labels statements without categories.")
+
+# ------------------------- Global search (token index) -------------------------
+# every view below works on the matching transactions, e.g. all "amazon" spend across years
+search_query = st.text_input("🔎 Search transactions (description or category; words match by prefix, all must match)",
+                             key="global_search", placeholder="e.g. amazon, emi, swiggy food")
+if tokenize(search_query):
+    total_rows = len(df) if df is not None else int(cube["count"].sum())
+    found = search_ledger(df, cube, dataset_key, search_query)
+    if found is None:
+        st.warning(f"No transactions match \"{search_query.strip()}\"; showing all transactions.")
+    else:
+        df, cube, dataset_key = found
+        st.caption(f"Search \"{search_query.strip()}\": {len(df):,} of {total_rows:,} transactions.")
+
 # ------------------------- years available (for global filter) -------------------------
-years_available = sorted(df["year"].dropna().unique().tolist())
+years_available = sorted(cube["year"].unique().tolist())
 
 # ------------------------- Session-state initialization -------------------------
 if "compare_active" not in st.session_state:
@@ -240,6 +478,10 @@ if "bestworst_active" not in st.session_state:
     st.session_state.bestworst_active = False
 if "ai_active" not in st.session_state:
     st.session_state.ai_active = False
+if "txns_active" not in st.session_state:
+    st.session_state.txns_active = False  # stays open while paging/searching
+if "monthly_active" not in st.session_state:
+    st.session_state.monthly_active = False  # stays open while changing the forecast horizon
 if "iso_contamination" not in st.session_state:
     st.session_state.iso_contamination = 0.05
 if "iso_use_abs" not in st.session_state:
@@ -277,108 +519,101 @@ if show_overview:
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_monthly:
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = True
 if show_yearly:
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_categories:
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_bestworst:
     st.session_state.bestworst_active = True
     st.session_state.compare_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_ai:
     st.session_state.ai_active = True
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_compare_btn:
     st.session_state.compare_active = True
     st.session_state.ai_active = False
     st.session_state.bestworst_active = False
+    st.session_state.txns_active = False
+    st.session_state.monthly_active = False
 if show_txns:
     st.session_state.compare_active = False
     st.session_state.bestworst_active = False
     st.session_state.ai_active = False
+    st.session_state.txns_active = True
+    st.session_state.monthly_active = False
 
 # store global year in session state
 st.session_state.global_year = selected_global_year
 
 # ------------------------- Build df_view based on global year -------------------------
-if st.session_state.global_year == "All":
-    df_view = df.copy()
-else:
+# cube_view is the matching slice of the aggregate cube; all summary views read from it
+view_year = None
+if st.session_state.global_year != "All":
     try:
-        gy = int(st.session_state.global_year)
-        df_view = df[df["year"] == gy].copy()
+        view_year = int(st.session_state.global_year)
     except Exception:
-        df_view = df.copy()
+        view_year = None
+df_view = ledger_view(df, dataset_key, view_year)
+cube_view = slice_year(cube, view_year)
+
+# background model fits belong to one dataset/year; switching cancels the stale ones
+if "ml_jobs" not in st.session_state:
+    st.session_state.ml_jobs = JobBoard()
+ml_jobs = st.session_state.ml_jobs
+if ml_jobs.set_scope((dataset_key, view_year)) and "clusterer" in st.session_state:
+    st.session_state.clusterer.cancel()
 
 # if filtered view becomes empty, warn but continue (so UI doesn't crash)
 if df_view.empty:
     st.warning("No data for the selected year. The dashboard will show empty/zeroed views for that year.")
 
-# ------------------------- Derived Stats (based on df_view) -------------------------
+# ------------------------- Derived Stats (based on cube_view) -------------------------
 # Use 'actual_amount' for calculations (income positive, expense negative)
 if "actual_amount" not in df_view.columns:
     st.error("The dataset doesn't contain 'actual_amount' after classification. Aborting.")
     st.stop()
 
-total_income = df_view[df_view['actual_amount'] > 0]['actual_amount'].sum()
-total_expense = df_view[df_view['actual_amount'] < 0]['actual_amount'].abs().sum()
-current_balance_lifetime = total_income - total_expense
+with profiler.stage("derived stats"):
+    metrics = headline_metrics(cube, view_year)
+    # per-month/category running statistics behind the trend views (moving averages, volatility)
+    trend_stats = shared_results().get_or_compute(("trend stats", dataset_key), lambda: MonthlyStats.from_cube(cube))
+total_income, total_expense = metrics["income"], metrics["expense"]
 
 # Monthly breakdowns (period index)
-monthly_income = df_view[df_view['actual_amount'] > 0].groupby('month')['actual_amount'].sum()
-monthly_expense = df_view[df_view['actual_amount'] < 0]['actual_amount'].abs().groupby(df_view['month']).sum()
-
-all_months = sorted(set(monthly_income.index.tolist() + monthly_expense.index.tolist()))
-monthly_income = monthly_income.reindex(all_months, fill_value=0)
-monthly_expense = monthly_expense.reindex(all_months, fill_value=0)
-monthly_savings = monthly_income - monthly_expense
-
-if len(all_months) == 0:
-    current_month = "N/A"
-    previous_month = None
-    current_month_savings = 0
-    previous_month_savings = 0
-else:
-    current_month = all_months[-1]
-    previous_month = all_months[-2] if len(all_months) > 1 else None
-    current_month_savings = monthly_savings.loc[current_month] if current_month in monthly_savings.index else 0
-    previous_month_savings = monthly_savings.loc[previous_month] if (previous_month and previous_month in monthly_savings.index) else 0
-
-# Yearly breakdowns (from full df aggregated by year but still we show "selected year" YTD)
-yearly_income_full = df[df['actual_amount'] > 0].groupby('year')['actual_amount'].sum()
-yearly_expense_full = df[df['actual_amount'] < 0]['actual_amount'].abs().groupby(df['year']).sum()
-years_union_full = sorted(set(list(yearly_income_full.index) + list(yearly_expense_full.index)))
-yearly_income_full = yearly_income_full.reindex(years_union_full, fill_value=0)
-yearly_expense_full = yearly_expense_full.reindex(years_union_full, fill_value=0)
-yearly_net_full = yearly_income_full - yearly_expense_full
-yearly_full = yearly_net_full.reindex(sorted(yearly_net_full.index.tolist()), fill_value=0)
-
-def pct_change_str(curr, prev):
-    try:
-        if prev == 0:
-            return "N/A"
-        return f"{round(((curr - prev) / prev) * 100, 2)}%"
-    except Exception:
-        return "N/A"
+monthly_income, monthly_expense = metrics["monthly_income"], metrics["monthly_expense"]
+monthly_savings = metrics["monthly_savings"]
+all_months = metrics["months"]
+current_month, previous_month = metrics["current_month"], metrics["previous_month"]
+current_month_savings, previous_month_savings = metrics["current_month_net"], metrics["previous_month_net"]
 
-# ------------------------- Other derived helpers (based on df_view) -------------------------
-cat_full = df_view.groupby(["month", "category"])["actual_amount"].sum().reset_index()
-total_by_cat = cat_full.groupby("category")["actual_amount"].sum().sort_values(ascending=False)
-top_category = total_by_cat.index[0] if len(total_by_cat) > 0 else "N/A"
-top_cat_total = total_by_cat.iloc[0] if len(total_by_cat) > 0 else 0
-months_with_top_cat = cat_full[cat_full['category'] == top_category].sort_values(by='actual_amount', ascending=False)
-top_month_for_cat = months_with_top_cat.iloc[0]['month'] if not months_with_top_cat.empty else "N/A"
+# Yearly breakdowns (from full data aggregated by year but still we show "selected year" YTD)
+yearly_income_full, yearly_expense_full = metrics["yearly_income"], metrics["yearly_expense"]
 
-monthly_total_amount = df_view.groupby("month")["actual_amount"].sum().reindex(all_months, fill_value=0)
+# ------------------------- Other derived helpers (based on cube_view) -------------------------
+top_category, top_cat_total = metrics["top_category"], metrics["top_category_total"]
+top_month_for_cat = metrics["top_category_peak_month"]
 
 # ------------------------- Conditional sidebar when comparing -------------------------
 selected_view_year_sidebar = "All"
@@ -394,356 +629,365 @@ if st.session_state.compare_active:
     year_b = st.sidebar.selectbox("Year B", options=["Select"] + [str(y) for y in years_available])
     compare_years_btn = st.sidebar.button("Compare Years")
 # ------------------------- Overview -------------------------
-if (not st.session_state.compare_active) and (show_overview or (not any([show_overview, show_monthly, show_yearly, show_categories, show_bestworst, show_ai, show_txns]) and not st.session_state.ai_active and not st.session_state.bestworst_active)):
-
-    st.markdown('<div class="glass" style="margin-top:18px;padding:18px 22px 22px 22px;">', unsafe_allow_html=True)
-    st.markdown(
-        "<div style='display:flex;justify-content:space-between;align-items:center;'>"
-        "<div><h2 style='margin:0px'>🌐 Executive Financial Overview</h2>"
-        f"<div class='muted' style='margin-top:4px;'>A concise executive snapshot (Year filter: <b>{st.session_state.global_year}</b>).</div></div>"
-        "</div>", 
-        unsafe_allow_html=True
-    )
-
-    # ---------------- FILTER YEAR FOR OVERVIEW ----------------
-    if st.session_state.global_year != "All":
-        df_view = df[df["year"] == int(st.session_state.global_year)]
-    else:
-        df_view = df.copy()
-
-    # ---- LIFETIME & INCOME/EXPENSE CALCULATIONS (FILTERED) ----
-    lifetime_income = df_view[df_view['actual_amount'] > 0]['actual_amount'].sum()
-    lifetime_expense = df_view[df_view['actual_amount'] < 0]['actual_amount'].abs().sum()
-    lifetime_net = lifetime_income - lifetime_expense
-
-    # ---- YTD NET ----
-    if st.session_state.global_year != "All":
-        vy = int(st.session_state.global_year)
-        y_income = yearly_income_full.loc[vy] if vy in yearly_income_full.index else 0
-        y_expense = yearly_expense_full.loc[vy] if vy in yearly_expense_full.index else 0
-        y_net = y_income - y_expense
-        prev_y_net = (yearly_full.loc[vy-1] if (vy-1) in yearly_full.index else 0)
-        y_yoy = pct_change_str(y_net, prev_y_net)
-    else:
-        y_net = yearly_full.sum() if len(yearly_full) > 0 else 0
-        y_yoy = "N/A"
-
-    # ---- MOM CHANGE ----
-    mom_change = pct_change_str(current_month_savings, previous_month_savings) if previous_month is not None else "N/A"
-
-    # ---- METRICS ----
-    c1, c2, c3, c4 = st.columns(4)
-
-    # lifetime
-    with c1:
-        st.markdown(f"""
-        <div class='glass-sm' style='padding:16px;'>
-            <div class='small'>💳 Lifetime Net Balance</div>
-            <div class='metric'>₹{lifetime_net:,.2f}</div>
-            <div class='muted'>Income − Expense across selected data</div>
-        </div>
-        """, unsafe_allow_html=True)
+if (not st.session_state.compare_active) and (show_overview or (not any([show_overview, show_monthly, show_yearly, show_categories, show_bestworst, show_ai, show_txns]) and not st.session_state.ai_active and not st.session_state.bestworst_active and not st.session_state.txns_active and not st.session_state.monthly_active)):
+    with profiler.stage("view: Overview"):
+
+        st.markdown('<div class="glass" style="margin-top:18px;padding:18px 22px 22px 22px;">', unsafe_allow_html=True)
+        st.markdown(
+            "<div style='display:flex;justify-content:space-between;align-items:center;'>"
+            "<div><h2 style='margin:0px'>🌐 Executive Financial Overview</h2>"
+            f"<div class='muted' style='margin-top:4px;'>A concise executive snapshot (Year filter: <b>{st.session_state.global_year}</b>).</div></div>"
+            "</div>", 
+            unsafe_allow_html=True
+        )
 
-    # this month
-    with c2:
-        st.markdown(f"""
-        <div class='glass-sm' style='padding:16px;'>
-            <div class='small'>📅 This Month Net ({current_month})</div>
-            <div class='metric'>₹{current_month_savings:,.2f}</div>
-            <div class='muted'>MoM change vs previous month: <b>{mom_change}</b></div>
-        </div>
-        """, unsafe_allow_html=True)
+        # ---- LIFETIME, YTD & MOM (FILTERED) ----
+        lifetime_net = metrics["net"]
+        y_net, y_yoy = metrics["ytd_net"], metrics["ytd_yoy"]
+        mom_change = metrics["mom_change"]
+
+        # ---- METRICS ----
+        c1, c2, c3, c4 = st.columns(4)
+
+        # lifetime
+        with c1:
+            st.markdown(f"""
+            <div class='glass-sm' style='padding:16px;'>
+                <div class='small'>💳 Lifetime Net Balance</div>
+                <div class='metric'>₹{lifetime_net:,.2f}</div>
+                <div class='muted'>Income − Expense across selected data</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # this month
+        with c2:
+            st.markdown(f"""
+            <div class='glass-sm' style='padding:16px;'>
+                <div class='small'>📅 This Month Net ({current_month})</div>
+                <div class='metric'>₹{current_month_savings:,.2f}</div>
+                <div class='muted'>MoM change vs previous month: <b>{mom_change}</b></div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # YTD
+        with c3:
+            st.markdown(f"""
+            <div class='glass-sm' style='padding:16px;'>
+                <div class='small'>📈 YTD Net ({st.session_state.global_year})</div>
+                <div class='metric'>₹{y_net:,.2f}</div>
+                <div class='muted'>YoY: <b>{y_yoy}</b></div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # top category
+        with c4:
+            st.markdown(f"""
+            <div class='glass-sm' style='padding:16px;'>
+                <div class='small'>🏷️ Top Category</div>
+                <div class='metric'>{top_category}</div>
+                <div class='muted'>Total: ₹{top_cat_total:,.2f} — Peak: {top_month_for_cat}</div>
+            </div>
+            """, unsafe_allow_html=True)
 
-    # YTD
-    with c3:
+        # explanation
+        st.markdown("<hr>", unsafe_allow_html=True)
         st.markdown(f"""
-        <div class='glass-sm' style='padding:16px;'>
-            <div class='small'>📈 YTD Net ({st.session_state.global_year})</div>
-            <div class='metric'>₹{y_net:,.2f}</div>
-            <div class='muted'>YoY: <b>{y_yoy}</b></div>
+        <div class='muted' style='line-height:1.5'>
+        <b>What this overview shows</b><br>
+        • Filter applies globally: <b>{st.session_state.global_year}</b>.<br>
+        • Lifetime Net, This Month Net and YTD all use filtered data.<br>
         </div>
         """, unsafe_allow_html=True)
 
-    # top category
-    with c4:
-        st.markdown(f"""
-        <div class='glass-sm' style='padding:16px;'>
-            <div class='small'>🏷️ Top Category</div>
-            <div class='metric'>{top_category}</div>
-            <div class='muted'>Total: ₹{top_cat_total:,.2f} — Peak: {top_month_for_cat}</div>
-        </div>
-        """, unsafe_allow_html=True)
+        # download snapshot
+        snapshot_df = overview_snapshot(metrics)
+        export_button("overview snapshot (CSV)", lambda: csv_bytes(snapshot_df), "overview_snapshot.csv",
+                      params=(view_year,), rows=len(snapshot_df))
 
-    # explanation
-    st.markdown("<hr>", unsafe_allow_html=True)
-    st.markdown(f"""
-    <div class='muted' style='line-height:1.5'>
-    <b>What this overview shows</b><br>
-    • Filter applies globally: <b>{st.session_state.global_year}</b>.<br>
-    • Lifetime Net, This Month Net and YTD all use filtered data.<br>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # download snapshot
-    snapshot_df = pd.DataFrame({
-        "metric": ["lifetime_net", "current_month_net", "ytd_net", "top_category"],
-        "value": [lifetime_net, current_month_savings, y_net, top_category]
-    })
-    st.download_button("Download overview snapshot (CSV)", snapshot_df.to_csv(index=False).encode(), file_name="overview_snapshot.csv")
-
-    st.markdown("</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Monthly Trend -------------------------
-# Show Monthly Trend ONLY when user clicks the button
-if show_monthly and not st.session_state.compare_active:
-    st.markdown('<div class="glass" style="margin-top:12px;">', unsafe_allow_html=True)
-    st.header(f"📈 Monthly Expense Trend (Year filter: {st.session_state.global_year})")
-    try:
-        x = [str(m) for m in all_months]
-        y = monthly_total_amount.values if len(monthly_total_amount) == len(all_months) else monthly_total_amount.reindex(all_months, fill_value=0).values
-        fig = px.line(x=x, y=y, markers=True, title="Monthly Net Amounts (income positive, expense negative)")
-        fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Month", yaxis_title="Amount (₹)")
-        st.plotly_chart(fig, use_container_width=True)
-    except Exception as e:
-        st.error("Unable to render monthly trend: " + str(e))
-    st.markdown("</div>", unsafe_allow_html=True)
+# Show Monthly Trend ONLY when user clicks the button (it stays open for the forecast horizon)
+if st.session_state.monthly_active and not st.session_state.compare_active:
+    with profiler.stage("view: Monthly Trend"):
+        st.markdown('<div class="glass" style="margin-top:12px;">', unsafe_allow_html=True)
+        st.header(f"📈 Monthly Expense Trend (Year filter: {st.session_state.global_year})")
+        try:
+            trend = trend_stats.rolling(view_year)
+            x = [str(m) for m in all_months]
+            y = trend["net"].reindex(all_months, fill_value=0).values
+            fig = px.line(x=x, y=y, markers=True, title="Monthly Net Amounts (income positive, expense negative)")
+            fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Month", yaxis_title="Amount (₹)")
+            st.plotly_chart(fig, use_container_width=True)
+
+            # moving averages and volatility reach back before the year filter (empty months count as zero)
+            trend_plot = trend.set_axis(trend.index.astype(str))
+            ma_cols = [f"ma_{w}" for w in ROLLING_WINDOWS]
+            fig_ma = px.line(trend_plot, y=["net"] + ma_cols, markers=True, title="Monthly Net with 3/6/12-month Moving Averages")
+            fig_ma.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Month", yaxis_title="Amount (₹)")
+            st.plotly_chart(fig_ma, use_container_width=True)
+            fig_vol = px.line(trend_plot, y=[f"vol_{w}" for w in ROLLING_WINDOWS], markers=True,
+                              title="Volatility (rolling standard deviation of monthly net)")
+            fig_vol.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Month", yaxis_title="Amount (₹)")
+            st.plotly_chart(fig_vol, use_container_width=True)
+            export_button("monthly trends (CSV)", lambda: csv_bytes(trend.reset_index()), "monthly_trends.csv",
+                          params=(view_year,), rows=len(trend))
+
+            # forecasts always use the full history (not the year filter), cached per dataset and horizon
+            st.markdown("### 🔮 Cash-flow forecast")
+            horizon = st.select_slider("Forecast horizon (months)", options=FORECAST_HORIZONS, value=DEFAULT_HORIZON,
+                                       key="forecast_horizon")
+            with profiler.stage("forecast"):
+                forecast = shared_results().get_or_compute(("forecast", dataset_key, horizon),
+                                                           lambda: forecast_categories(cube, horizon))
+            if forecast.empty:
+                st.info("Not enough income/expense history to forecast.")
+            else:
+                flow = forecast_cashflow(forecast)
+                history = trend_stats.monthly()[["income", "expense", "net"]].rename(columns={"net": "savings"})
+                flow_plot = pd.concat([history.assign(series="actual"), flow.assign(series="forecast")])
+                flow_plot = flow_plot.set_axis(flow_plot.index.astype(str)).rename_axis("month").reset_index()
+                flow_plot = flow_plot.melt(id_vars=["month", "series"], value_vars=["income", "expense", "savings"],
+                                           var_name="measure", value_name="amount")
+                fig_fc = px.line(flow_plot, x="month", y="amount", color="measure", line_dash="series", markers=True,
+                                 title=f"Income, Expense and Savings — next {horizon} months")
+                fig_fc.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Month", yaxis_title="Amount (₹)")
+                st.plotly_chart(fig_fc, use_container_width=True)
+                f1, f2, f3 = st.columns(3)
+                f1.metric("Forecast income", f"₹{flow['income'].sum():,.2f}")
+                f2.metric("Forecast expense", f"₹{flow['expense'].sum():,.2f}")
+                f3.metric("Forecast savings", f"₹{flow['savings'].sum():,.2f}")
+                with st.expander("Forecast per category"):
+                    per_category = forecast.pivot_table(index=["kind", "category"], columns="month", values="forecast", aggfunc="sum")
+                    per_category.columns = per_category.columns.astype(str)
+                    st.dataframe(per_category, use_container_width=True)
+                st.caption("Each category uses whichever of seasonal-naive, damped trend or linear trend "
+                           "forecast its last months best; the forecast covers all data, not just the year filter.")
+                export_button("cash-flow forecast (CSV)", lambda: csv_bytes(forecast), "cashflow_forecast.csv",
+                              params=(horizon,), rows=len(forecast))
+        except Exception as e:
+            st.error("Unable to render monthly trend: " + str(e))
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Yearly Trend -------------------------
 if (not st.session_state.compare_active) and show_yearly:
-    st.markdown('<div class="glass" style="margin-top:12px;">', unsafe_allow_html=True)
-    st.header("📅 Yearly Expense Trend (ALL data)")
-    try:
-        year_index = sorted(set(list(yearly_income_full.index) + list(yearly_expense_full.index)))
-        y_vals = [(yearly_income_full.loc[y] if y in yearly_income_full.index else 0) - (yearly_expense_full.loc[y] if y in yearly_expense_full.index else 0) for y in year_index]
-        fig2 = px.bar(x=[str(y) for y in year_index], y=y_vals, title="Yearly Net (Income − Expense)")
-        fig2.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Year", yaxis_title="Net (₹)")
-        st.plotly_chart(fig2, use_container_width=True)
-    except Exception as e:
-        st.error("Unable to render yearly trend: " + str(e))
-    st.markdown("</div>", unsafe_allow_html=True)
+    with profiler.stage("view: Yearly Trend"):
+        st.markdown('<div class="glass" style="margin-top:12px;">', unsafe_allow_html=True)
+        st.header("📅 Yearly Expense Trend (ALL data)")
+        try:
+            year_index = sorted(set(list(yearly_income_full.index) + list(yearly_expense_full.index)))
+            y_vals = [(yearly_income_full.loc[y] if y in yearly_income_full.index else 0) - (yearly_expense_full.loc[y] if y in yearly_expense_full.index else 0) for y in year_index]
+            fig2 = px.bar(x=[str(y) for y in year_index], y=y_vals, title="Yearly Net (Income − Expense)")
+            fig2.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", xaxis_title="Year", yaxis_title="Net (₹)")
+            st.plotly_chart(fig2, use_container_width=True)
+        except Exception as e:
+            st.error("Unable to render yearly trend: " + str(e))
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Categories -------------------------
 if (not st.session_state.compare_active) and show_categories:
-    st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
-    st.header(f"🏷️ Category-wise Spending (Year filter: {st.session_state.global_year})")
-    try:
-        df_view_local = df_view.copy()
-        cat = (
-            df_view_local
-            .assign(amount_positive = df_view_local["actual_amount"].abs())
-            .groupby("category")["amount_positive"]
-            .sum()
-            .sort_values(ascending=False)
-        )
-        fig3 = px.pie(cat, names=cat.index, values=cat.values, hole=0.45, title="Category Split (net)")
-        st.plotly_chart(fig3, use_container_width=True)
-        st.markdown("#### Category totals")
-        st.dataframe(cat.reset_index().rename(columns={'actual_amount':'total'}), use_container_width=True)
-        csv_bytes = df_view_local.groupby("category")["actual_amount"].sum().reset_index().to_csv(index=False).encode()
-        st.download_button("Download category totals (CSV)", csv_bytes, file_name="category_totals.csv")
-    except Exception as e:
-        st.error("Unable to render categories: " + str(e))
-    st.markdown("</div>", unsafe_allow_html=True)
+    with profiler.stage("view: Categories"):
+        st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
+        st.header(f"🏷️ Category-wise Spending (Year filter: {st.session_state.global_year})")
+        try:
+            cat = category_abs_totals(cube_view)
+            fig3 = px.pie(cat, names=cat.index, values=cat.values, hole=0.45, title="Category Split (net)")
+            st.plotly_chart(fig3, use_container_width=True)
+            st.markdown("#### Category totals")
+            st.dataframe(cat.reset_index().rename(columns={'actual_amount':'total'}), use_container_width=True)
+            export_button("category totals (CSV)", lambda: csv_bytes(net_by(cube_view, "category").reset_index()),
+                          "category_totals.csv", params=(view_year,), rows=len(cat))
+        except Exception as e:
+            st.error("Unable to render categories: " + str(e))
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Best/Worst (Deep) -------------------------
 if st.session_state.bestworst_active:
-    st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
-    st.header(f"⭐ Financial Highlights — Deep Analysis (Year filter: {st.session_state.global_year})")
-    try:
-        monthly_expense_local = df_view[df_view['actual_amount'] < 0].groupby('month')['actual_amount'].sum().abs()
-        monthly_income_local = df_view[df_view['actual_amount'] > 0].groupby('month')['actual_amount'].sum()
-        months_index = sorted(set(monthly_expense_local.index.tolist() + monthly_income_local.index.tolist()))
-        monthly_expense_local = monthly_expense_local.reindex(months_index, fill_value=0)
-        monthly_income_local = monthly_income_local.reindex(months_index, fill_value=0)
-        monthly_savings_local = (monthly_income_local - monthly_expense_local).rename('savings')
-
-        summary_df = pd.DataFrame({'expense': monthly_expense_local, 'income': monthly_income_local, 'savings': monthly_savings_local})
-        summary_df['expense_diff'] = summary_df['expense'].diff().fillna(0)
-        summary_df['expense_pct_change'] = (summary_df['expense'].pct_change().fillna(0) * 100).round(2)
-        summary_df['savings_diff'] = summary_df['savings'].diff().fillna(0)
-        summary_df['savings_pct_change'] = (summary_df['savings'].pct_change().fillna(0) * 100).round(2)
-
-        worst_spend_month = summary_df['expense'].idxmax() if not summary_df['expense'].empty else "N/A"
-        worst_spend_val = summary_df['expense'].max() if not summary_df['expense'].empty else 0
-        best_spend_month = summary_df['expense'].idxmin() if not summary_df['expense'].empty else "N/A"
-        best_spend_val = summary_df['expense'].min() if not summary_df['expense'].empty else 0
-        best_saving_month = summary_df['savings'].idxmax() if not summary_df['savings'].empty else "N/A"
-        best_saving_val = summary_df['savings'].max() if not summary_df['savings'].empty else 0
-        worst_saving_month = summary_df['savings'].idxmin() if not summary_df['savings'].empty else "N/A"
-        worst_saving_val = summary_df['savings'].min() if not summary_df['savings'].empty else 0
-
-        c1,c2,c3,c4 = st.columns(4)
-        c1.markdown(f"**🔴 Worst Spend Month**\n\n{worst_spend_month} — ₹{worst_spend_val:,.2f}")
-        c2.markdown(f"**🟢 Best (Lowest) Spend Month**\n\n{best_spend_month} — ₹{best_spend_val:,.2f}")
-        c3.markdown(f"**💰 Best Saving Month**\n\n{best_saving_month} — ₹{best_saving_val:,.2f}")
-        c4.markdown(f"**⚠️ Worst Saving Month**\n\n{worst_saving_month} — ₹{worst_saving_val:,.2f}")
-
-        st.markdown("---")
-        display_df = summary_df.copy()
-        display_df.index = display_df.index.astype(str)
-        display_df_display = display_df.reset_index().rename(columns={'index':'month'})
-        display_df_display['expense'] = display_df_display['expense'].map(lambda x: f"₹{x:,.2f}")
-        display_df_display['income'] = display_df_display['income'].map(lambda x: f"₹{x:,.2f}")
-        display_df_display['savings'] = display_df_display['savings'].map(lambda x: f"₹{x:,.2f}")
-        display_df_display['expense_diff'] = display_df_display['expense_diff'].map(lambda x: f"₹{x:,.2f}")
-        display_df_display['expense_pct_change'] = display_df_display['expense_pct_change'].map(lambda x: f"{x}%")
-        display_df_display['savings_diff'] = display_df_display['savings_diff'].map(lambda x: f"₹{x:,.2f}")
-        display_df_display['savings_pct_change'] = display_df_display['savings_pct_change'].map(lambda x: f"{x}%")
-
-        st.markdown("### 📅 Month-by-Month Financial Summary")
-        st.dataframe(display_df_display.set_index('month'), use_container_width=True)
-        st.download_button("Download monthly summary (CSV)", df_to_csv_bytes(display_df.reset_index()), file_name="monthly_summary.csv")
-
-        # Compare months
-        st.markdown("---")
-        st.markdown("📊 **Compare Multiple Months** (pick 2 or more)")
-
-        month_list = sorted(df_view["month"].astype(str).unique())
-
-        sel_months = st.multiselect(
-            "Select months (order will be chronological)",
-            month_list,
-            default=[],   # start empty so user must actively choose
-            key="compare_months_selector_local"
-        )
-        st.session_state.compare_months_selection = sel_months
-
-        if len(sel_months) >= 2:
-            sel_idx = pd.PeriodIndex(sel_months, freq="M")
-            comp = df_view[df_view["month"].astype(str).isin(sel_months)].groupby("month")["actual_amount"].sum().reindex(sel_idx).sort_index()
-            st.markdown("#### 📅 Monthly Spending Summary")
-            st.dataframe(comp.to_frame("Total Net (₹)"))
-            diffs = comp.diff().fillna(0)
-            diff_df = pd.DataFrame({"Month": comp.index.astype(str), "Net": comp.values, "Diff From Prev": diffs.values})
-            st.markdown("#### 🔍 Month-to-Month Gain/Loss")
-            st.dataframe(diff_df)
-            st.markdown("#### 📈 Trend")
-            fig_c = px.line(x=comp.index.astype(str), y=comp.values, markers=True)
-            st.plotly_chart(fig_c, use_container_width=True)
-
-            compare_export_df = comp.reset_index().rename(columns={"month":"month","actual_amount":"amount"})
-            st.download_button("Download compared months (CSV)", compare_export_df.to_csv(index=False).encode(), file_name="compared_months.csv")
-        else:
-            st.info("Select at least 2 months to compare.")
-
-        # per-month category drilldown
-        st.markdown("---")
-        st.markdown("### 🏷️ Explore a month's category breakdown")
-        month_to_explore = st.selectbox("Select month for category drilldown", display_df.index.astype(str).tolist(), key="drilldown_month")
-        if month_to_explore:
-            month_df = df_view[df_view['month'].astype(str) == month_to_explore]
-            cat_break = (
-                month_df.assign(amount_positive = month_df["actual_amount"].abs())
-                        .groupby("category")["amount_positive"]
-                        .sum()
-                        .sort_values(ascending=False)
+    with profiler.stage("view: Best/Worst"):
+        st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
+        st.header(f"⭐ Financial Highlights — Deep Analysis (Year filter: {st.session_state.global_year})")
+        try:
+            monthly_stats = trend_stats.monthly(view_year)
+            summary_df = monthly_summary(monthly_stats["income"], monthly_stats["expense"])
+
+            worst_spend_month = summary_df['expense'].idxmax() if not summary_df['expense'].empty else "N/A"
+            worst_spend_val = summary_df['expense'].max() if not summary_df['expense'].empty else 0
+            best_spend_month = summary_df['expense'].idxmin() if not summary_df['expense'].empty else "N/A"
+            best_spend_val = summary_df['expense'].min() if not summary_df['expense'].empty else 0
+            best_saving_month = summary_df['savings'].idxmax() if not summary_df['savings'].empty else "N/A"
+            best_saving_val = summary_df['savings'].max() if not summary_df['savings'].empty else 0
+            worst_saving_month = summary_df['savings'].idxmin() if not summary_df['savings'].empty else "N/A"
+            worst_saving_val = summary_df['savings'].min() if not summary_df['savings'].empty else 0
+
+            c1,c2,c3,c4 = st.columns(4)
+            c1.markdown(f"**🔴 Worst Spend Month**\n\n{worst_spend_month} — ₹{worst_spend_val:,.2f}")
+            c2.markdown(f"**🟢 Best (Lowest) Spend Month**\n\n{best_spend_month} — ₹{best_spend_val:,.2f}")
+            c3.markdown(f"**💰 Best Saving Month**\n\n{best_saving_month} — ₹{best_saving_val:,.2f}")
+            c4.markdown(f"**⚠️ Worst Saving Month**\n\n{worst_saving_month} — ₹{worst_saving_val:,.2f}")
+
+            st.markdown("---")
+            display_df = summary_df.copy()
+            display_df.index = display_df.index.astype(str)
+            display_df_display = display_df.reset_index().rename(columns={'index':'month'})
+            display_df_display['expense'] = display_df_display['expense'].map(lambda x: f"₹{x:,.2f}")
+            display_df_display['income'] = display_df_display['income'].map(lambda x: f"₹{x:,.2f}")
+            display_df_display['savings'] = display_df_display['savings'].map(lambda x: f"₹{x:,.2f}")
+            display_df_display['expense_diff'] = display_df_display['expense_diff'].map(lambda x: f"₹{x:,.2f}")
+            display_df_display['expense_pct_change'] = display_df_display['expense_pct_change'].map(lambda x: f"{x}%")
+            display_df_display['savings_diff'] = display_df_display['savings_diff'].map(lambda x: f"₹{x:,.2f}")
+            display_df_display['savings_pct_change'] = display_df_display['savings_pct_change'].map(lambda x: f"{x}%")
+
+            st.markdown("### 📅 Month-by-Month Financial Summary")
+            st.dataframe(display_df_display.set_index('month'), use_container_width=True)
+            export_button("monthly summary (CSV)", lambda: df_to_csv_bytes(monthly_summary_export(summary_df)),
+                          "monthly_summary.csv", params=(view_year,), rows=len(summary_df))
+
+            # Compare months
+            st.markdown("---")
+            st.markdown("📊 **Compare Multiple Months** (pick 2 or more)")
+
+            month_list = months_available(cube_view)
+
+            sel_months = st.multiselect(
+                "Select months (order will be chronological)",
+                month_list,
+                default=[],   # start empty so user must actively choose
+                key="compare_months_selector_local"
             )
-            st.dataframe(cat_break.reset_index().rename(columns={'actual_amount':'total'}), use_container_width=True)
+            st.session_state.compare_months_selection = sel_months
+
+            if len(sel_months) >= 2:
+                sel_idx = pd.PeriodIndex(sel_months, freq="M")
+                comp = net_by(slice_months(cube_view, sel_months), "month").reindex(sel_idx).sort_index()
+                st.markdown("#### 📅 Monthly Spending Summary")
+                st.dataframe(comp.to_frame("Total Net (₹)"))
+                diffs = comp.diff().fillna(0)
+                diff_df = pd.DataFrame({"Month": comp.index.astype(str), "Net": comp.values, "Diff From Prev": diffs.values})
+                st.markdown("#### 🔍 Month-to-Month Gain/Loss")
+                st.dataframe(diff_df)
+                st.markdown("#### 📈 Trend")
+                fig_c = px.line(x=comp.index.astype(str), y=comp.values, markers=True)
+                st.plotly_chart(fig_c, use_container_width=True)
+
+                compare_export_df = comp.reset_index().rename(columns={"month":"month","actual_amount":"amount"})
+                export_button("compared months (CSV)", lambda: csv_bytes(compare_export_df), "compared_months.csv",
+                              params=(view_year, tuple(sel_months)), rows=len(compare_export_df))
+            else:
+                st.info("Select at least 2 months to compare.")
+
+            # per-month category drilldown
+            st.markdown("---")
+            st.markdown("### 🏷️ Explore a month's category breakdown")
+            month_to_explore = st.selectbox("Select month for category drilldown", display_df.index.astype(str).tolist(), key="drilldown_month")
+            if month_to_explore:
+                cat_break = category_abs_totals(slice_months(cube_view, [month_to_explore]))
+                st.dataframe(cat_break.reset_index().rename(columns={'actual_amount':'total'}), use_container_width=True)
             
-            fig_cat = px.pie(
-                cat_break,
-                names=cat_break.index,
-                values=cat_break.values,
-                hole=0.45,
-                title="Category Split (positive totals)"
-            )
-            st.plotly_chart(fig_cat, use_container_width=True)
-
-        st.markdown("---")
-        overall_trend = summary_df['expense'].iloc[-1] - summary_df['expense'].iloc[0] if len(summary_df) > 1 else 0
-        if overall_trend > 0:
-            st.warning("Overall expenses increased across the period. Consider targeting top categories.")
-        else:
-            st.success("Overall expenses decreased — good job managing spend.")
-    except Exception as e:
-        st.error("Unable to compute Best/Worst analysis: " + str(e))
-    st.markdown("</div>", unsafe_allow_html=True)
+                fig_cat = px.pie(
+                    cat_break,
+                    names=cat_break.index,
+                    values=cat_break.values,
+                    hole=0.45,
+                    title="Category Split (positive totals)"
+                )
+                st.plotly_chart(fig_cat, use_container_width=True)
+
+            st.markdown("---")
+            overall_trend = summary_df['expense'].iloc[-1] - summary_df['expense'].iloc[0] if len(summary_df) > 1 else 0
+            if overall_trend > 0:
+                st.warning("Overall expenses increased across the period. Consider targeting top categories.")
+            else:
+                st.success("Overall expenses decreased — good job managing spend.")
+        except Exception as e:
+            st.error("Unable to compute Best/Worst analysis: " + str(e))
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- AI Intelligence -------------------------
 if st.session_state.ai_active:
     st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
     st.header(f"🤖 AI Intelligence (Year filter: {st.session_state.global_year})")
 
-    tab1, tab2, tab3 = st.tabs(["🔍 Anomalies", "🧩 Clusters", "💡 AI Insights"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🔍 Anomalies", "🧩 Clusters", "🔁 Recurring Payments", "💡 AI Insights"])
 
     # ----------------- Anomalies -----------------
-    with tab1:
+    with tab1, profiler.stage("ml: anomalies"):
         st.subheader("Anomaly Detection — Isolation Forest")
         cont = st.slider("Contamination (expected proportion of anomalies)", min_value=0.001, max_value=0.2, value=st.session_state.iso_contamination, step=0.001, format="%.3f", key="iso_cont_slider")
         st.session_state.iso_contamination = cont
         use_abs_amount = st.checkbox("Use absolute amounts (treat large incomes/spends equally)", value=st.session_state.iso_use_abs, key="iso_use_abs_checkbox")
         st.session_state.iso_use_abs = use_abs_amount
 
-        df_ml = df_view.copy().reset_index(drop=True)
-        df_ml['day'] = df_ml['date'].dt.day
-        df_ml['month_num'] = df_ml['date'].dt.month
-        df_ml['amt_feat'] = df_ml['actual_amount'].abs() if use_abs_amount else df_ml['actual_amount']
-
-        top_n = 8
-        top_cats = df_ml['category'].value_counts().nlargest(top_n).index.tolist()
-        df_ml['category_trim'] = df_ml['category'].where(df_ml['category'].isin(top_cats), other='__other__')
-        cat_dummies = pd.get_dummies(df_ml['category_trim'], prefix='cat')
-
-        features = pd.concat([df_ml[['amt_feat', 'day', 'month_num']], cat_dummies], axis=1)
-
-        if len(features) < 5:
+        raw_scores = None
+        if len(df_view) < ANOMALY_MIN_ROWS:
             st.info("Not enough data to run anomaly detection reliably (need at least ~5 transactions).")
         else:
-            scaler = StandardScaler()
-            X = scaler.fit_transform(features)
-
-            iso = IsolationForest(contamination=float(cont), random_state=42)
-            iso.fit(X)
-            preds = iso.predict(X)
-            scores = iso.decision_function(X)
-
-            df_ml['anomaly'] = preds
-            df_ml['anomaly_score'] = scores
+            # models are cached per dataset/year/feature config and fitted in the background;
+            # the slider only re-thresholds
+            if "anomaly_cache" not in st.session_state:
+                st.session_state.anomaly_cache = AnomalyScoreCache(cache_dir=UPLOAD_CACHE_DIR)
+            anomaly_cache, view_key = st.session_state.anomaly_cache, str(st.session_state.global_year)
+            scores_job = ml_jobs.submit(
+                ("anomaly scores", use_abs_amount), shared_results().get_or_compute,
+                ("anomaly scores", dataset_key, view_key, use_abs_amount),
+                lambda: anomaly_cache.raw_scores(df_view, dataset_key, view_key, use_abs=use_abs_amount),
+                persist=True,
+            )
+            raw_scores = job_result(scores_job, f"Scoring {len(df_view):,} transactions with Isolation Forest")
+        if raw_scores is not None:
+            df_ml = label_anomalies(expand_months(df_view), raw_scores, float(cont))
             anomalies = df_ml[df_ml['anomaly'] == -1].sort_values(by='anomaly_score')
 
             st.markdown(f"Detected **{len(anomalies)}** anomalies (contamination={cont}).")
             ts = df_ml.groupby('date')['actual_amount'].sum().reset_index()
             anom_dates = anomalies['date'].unique().tolist()
             ts['is_anom'] = ts['date'].isin(anom_dates)
-            fig_ts = px.line(ts, x='date', y='actual_amount', title="Net amount over time (anomalies highlighted)", markers=True)
+            ts_view, point_budget = chart_detail(ts, "anom_chart")
+            # anomaly days stay on the line while they fit the budget; the red markers below always show all of them
+            keep_days = ts_view['is_anom'] if ts_view['is_anom'].sum() <= point_budget // 2 else None
+            ts_plot = downsample_line(ts_view, 'date', 'actual_amount', point_budget, keep=keep_days)
+            if len(ts_plot) < len(ts_view):
+                st.caption(f"Showing {len(ts_plot):,} of {len(ts_view):,} days on the line (LTTB downsampled); every anomaly day is marked.")
+            fig_ts = px.line(ts_plot, x='date', y='actual_amount', title="Net amount over time (anomalies highlighted)", markers=True,
+                             render_mode=render_mode(len(ts_plot)))
             if len(anomalies) > 0:
                 anom_points = anomalies.groupby('date')['actual_amount'].sum().reset_index()
-                fig_ts.add_scatter(x=anom_points['date'].astype(str), y=anom_points['actual_amount'], mode='markers', marker=dict(color='red', size=8), name="Anomaly")
+                anom_points = anom_points[anom_points['date'].isin(ts_view['date'])]
+                add_points = fig_ts.add_scattergl if len(anom_points) > WEBGL_MIN_POINTS else fig_ts.add_scatter
+                add_points(x=anom_points['date'].astype(str), y=anom_points['actual_amount'], mode='markers', marker=dict(color='red', size=8), name="Anomaly")
             st.plotly_chart(fig_ts, use_container_width=True)
 
             st.markdown("### ⚠️ Anomaly Table (top anomalies)")
-            display_anom = anomalies[['date', 'description', 'actual_amount', 'category', 'anomaly_score']].copy()
-            display_anom = display_anom.sort_values(by='anomaly_score')
+            display_anom = anomaly_table(df_ml)
             st.dataframe(display_anom.reset_index(drop=True), use_container_width=True)
-            st.download_button("Download anomalies (CSV)", display_anom.to_csv(index=False).encode(), file_name="anomalies.csv")
+            export_button("anomalies (CSV)", lambda: csv_bytes(display_anom), "anomalies.csv",
+                          params=(view_year, float(cont), use_abs_amount), rows=len(display_anom))
 
     # ----------------- Clustering -----------------
-    with tab2:
+    with tab2, profiler.stage("ml: clusters"):
         st.subheader("Spending Clusters — K-Means")
         cluster_type = st.radio("Cluster by:", options=["Transactions (each txn)", "Monthly totals"], index=0, key="cluster_type_radio")
         if cluster_type == "Transactions (each txn)":
             n_clusters = st.slider("Number of clusters", 2, 6, value=st.session_state.n_clusters_txn, key="n_clusters_txn_slider")
             st.session_state.n_clusters_txn = n_clusters
 
-            tx_df = df_view.copy().reset_index(drop=True)
-            tx_df['day'] = tx_df['date'].dt.day
-            tx_df['month_num'] = tx_df['date'].dt.month
-            tx_df['amt_feat'] = tx_df['actual_amount'].abs()
-
-            top_n = 6
-            top_cats = tx_df['category'].value_counts().nlargest(top_n).index.tolist()
-            tx_df['category_trim'] = tx_df['category'].where(tx_df['category'].isin(top_cats), other='__other__')
-            cat_dummies = pd.get_dummies(tx_df['category_trim'], prefix='cat')
-            feats = pd.concat([tx_df[['amt_feat', 'day', 'month_num']], cat_dummies], axis=1)
-
-            if len(feats) < n_clusters:
+            # feature matrix + per-k labels are cached per dataset/year and built in the background;
+            # other k values are fitted ahead of time
+            clusterer_key = (dataset_key, str(st.session_state.global_year))
+            if st.session_state.get("clusterer_key") != clusterer_key:
+                features_job = ml_jobs.submit("cluster features", lambda: TransactionClusterer(expand_months(df_view)))
+                built = job_result(features_job, f"Building clustering features for {len(df_view):,} transactions")
+                if built is not None:
+                    st.session_state.clusterer, st.session_state.clusterer_key = built, clusterer_key
+            clusterer = st.session_state.clusterer if st.session_state.get("clusterer_key") == clusterer_key else None
+
+            labels = None
+            if clusterer is not None and len(clusterer) < n_clusters:
                 st.info("Not enough distinct data to form that many clusters. Lower the number of clusters.")
-            else:
-                scaler = StandardScaler()
-                X = scaler.fit_transform(feats)
-                km = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-                labels = km.fit_predict(X)
-                tx_df['cluster'] = labels
+            elif clusterer is not None:
+                labels = job_result(clusterer.submit(n_clusters), f"Fitting {n_clusters} clusters on {len(clusterer):,} transactions")
+                clusterer.precompute()
+            if labels is not None:
+                tx_df = clusterer.frame.assign(cluster=labels)
 
                 cluster_summary = tx_df.groupby('cluster')['amt_feat'].agg(['count', 'mean', 'sum']).sort_values(by='mean', ascending=False).reset_index()
                 cluster_summary['mean'] = cluster_summary['mean'].map(lambda x: f"₹{x:,.2f}")
@@ -753,8 +997,13 @@ if st.session_state.ai_active:
 
                 scatter_df = tx_df.copy()
                 scatter_df['amount_signed'] = scatter_df['actual_amount']
-                fig_sc = px.scatter(scatter_df, x='date', y='amount_signed', color=scatter_df['cluster'].astype(str),
-                                    title="Transactions colored by cluster", hover_data=['description', 'category'])
+                scatter_view, point_budget = chart_detail(scatter_df, "cluster_chart")
+                scatter_plot = downsample_groups(scatter_view, 'date', 'amount_signed', 'cluster', point_budget)
+                if len(scatter_plot) < len(scatter_view):
+                    st.caption(f"Showing {len(scatter_plot):,} of {len(scatter_view):,} transactions (per-cluster min/max per date bucket).")
+                fig_sc = px.scatter(scatter_plot, x='date', y='amount_signed', color=scatter_plot['cluster'].astype(str),
+                                    title="Transactions colored by cluster", hover_data=['description', 'category'],
+                                    render_mode=render_mode(len(scatter_plot)))
                 st.plotly_chart(fig_sc, use_container_width=True)
 
                 st.markdown("### Sample transactions per cluster")
@@ -762,112 +1011,142 @@ if st.session_state.ai_active:
                     st.markdown(f"**Cluster {c} — sample (top 5 by amount)**")
                     st.dataframe(tx_df[tx_df['cluster'] == c].sort_values(by='amt_feat', ascending=False)[['date', 'description', 'actual_amount', 'category']].head(5), use_container_width=True)
 
-                st.download_button("Download clustered transactions (CSV)", tx_df.to_csv(index=False).encode(), file_name="clustered_transactions.csv")
+                export_button("clustered transactions (CSV)", lambda: csv_bytes(tx_df), "clustered_transactions.csv",
+                              params=(view_year, n_clusters), rows=len(tx_df))
         else:
             n_clusters = st.slider("Number of clusters (months)", 2, 6, value=st.session_state.n_clusters_months, key="n_clusters_months_slider")
             st.session_state.n_clusters_months = n_clusters
 
-            month_tot = df_view.groupby('month')['actual_amount'].sum().reset_index()
-            if month_tot.empty:
+            if cube_view.empty:
                 st.info("Not enough monthly data to cluster.")
             else:
-                month_tot['month_num'] = month_tot['month'].dt.month
-                month_tot['amt_abs'] = month_tot['actual_amount'].abs()
-                feats = month_tot[['amt_abs', 'month_num']]
-                if len(month_tot) < n_clusters:
+                month_tot = cluster_months(cube_view, n_clusters)
+                if month_tot is None:
                     st.info("Not enough months to form that many clusters. Lower the number of clusters.")
                 else:
-                    scaler = StandardScaler()
-                    X = scaler.fit_transform(feats)
-                    km = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-                    month_tot['cluster'] = km.fit_predict(X)
                     st.markdown("### Monthly Cluster Assignments")
                     st.dataframe(month_tot[['month', 'actual_amount', 'cluster']].sort_values(by='month'), use_container_width=True)
                     fig_m = px.line(month_tot.sort_values(by='month')['month'].astype(str), y=month_tot.sort_values(by='month')['actual_amount'],
                                     title="Monthly totals (clusters shown as markers)")
                     st.plotly_chart(fig_m, use_container_width=True)
-                    st.download_button("Download monthly clusters (CSV)", month_tot.to_csv(index=False).encode(), file_name="monthly_clusters.csv")
+                    export_button("monthly clusters (CSV)", lambda: csv_bytes(month_tot), "monthly_clusters.csv",
+                                  params=(view_year, n_clusters), rows=len(month_tot))
+
+    # ----------------- Recurring payments -----------------
+    with tab3, profiler.stage("ml: recurring"):
+        st.subheader("Recurring Payments — rent, EMIs, subscriptions (all years)")
+        # streams need their whole history, so detection ignores the year filter
+        recurring = shared_results().get_or_compute(("recurring", dataset_key), lambda: detect_recurring(full_ledger(df, dataset_key)))
+        if recurring.empty:
+            st.info("No recurring debits found (a stream needs at least 3 similar payments at a regular interval).")
+        else:
+            active = recurring[recurring["active"]]
+            r1, r2 = st.columns(2)
+            r1.metric("Active recurring streams", f"{len(active):,}")
+            r2.metric("Active recurring cost (monthly)", f"₹{active['monthly_cost'].sum():,.2f}")
+            st.dataframe(recurring, use_container_width=True)
+            export_button("recurring payments (CSV)", lambda: csv_bytes(recurring), "recurring_payments.csv",
+                          rows=len(recurring))
 
     # ----------------- AI Insights -----------------
-    with tab3:
+    with tab4, profiler.stage("ml: insights"):
         st.subheader("AI Insights — Summary Table")
-        cm_str = str(current_month)
-        pm_str = str(previous_month) if previous_month is not None else "N/A"
-        selected_view_year_display = st.session_state.global_year  # use global year here
-        if selected_view_year_display != "All":
-            vy = int(selected_view_year_display)
-            y_income_ins = yearly_income_full.loc[vy] if vy in yearly_income_full.index else 0
-            y_expense_ins = yearly_expense_full.loc[vy] if vy in yearly_expense_full.index else 0
-            y_net_ins = y_income_ins - y_expense_ins
-            prev_y_net_ins = (yearly_income_full.loc[vy-1] if (vy-1) in yearly_income_full.index else 0) - (yearly_expense_full.loc[vy-1] if (vy-1) in yearly_expense_full.index else 0)
-            y_yoy_ins = pct_change_str(y_net_ins, prev_y_net_ins)
-        else:
-            y_net_ins = yearly_full.sum() if len(yearly_full) > 0 else 0
-            y_yoy_ins = "N/A"
-
-        insights_table = pd.DataFrame([
-            ["Current Month (net)", cm_str, f"₹{current_month_savings:,.2f}"],
-            ["Previous Month (net)", pm_str, f"₹{previous_month_savings:,.2f}"],
-            ["Month-over-Month Change (savings)", "-", pct_change_str(current_month_savings, previous_month_savings) if previous_month is not None else "N/A"],
-            ["Selected Year (YTD net)", selected_view_year_display, f"₹{y_net_ins:,.2f}"],
-            ["Year-over-Year Change (YTD)", "-", y_yoy_ins],
-            ["Top Category (net)", top_category, f"₹{top_cat_total:,.2f}"],
-            ["Peak Month for Top Category", str(top_month_for_cat), "-"],
-            ["Total Transactions (in view)", len(df_view), "-"]
-        ], columns=["Insight", "Detail", "Value"])
-        st.table(insights_table.astype(str))
-        st.download_button("Download insights (CSV)", insights_table.to_csv(index=False).encode(), file_name="insights_table.csv")
+        insights_df = insights_table(metrics, st.session_state.global_year)  # use global year here
+        st.table(insights_df.astype(str))
+        export_button("insights (CSV)", lambda: csv_bytes(insights_df), "insights_table.csv",
+                      params=(view_year,), rows=len(insights_df))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Transactions view -------------------------
-if show_txns:
-    st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
-    st.header(f"📋 All Transactions (Year filter: {st.session_state.global_year})")
-    st.dataframe(df_view.sort_values(by="date", ascending=False).reset_index(drop=True), use_container_width=True)
-    st.download_button("Download transactions (CSV)", df_view.to_csv(index=False).encode(), file_name="transactions.csv")
-    excel_txn = df_to_excel_bytes({"transactions": df_view})
-    if excel_txn:
-        st.download_button("Download transactions (Excel)", excel_txn, file_name="transactions.xlsx")
-    st.markdown("</div>", unsafe_allow_html=True)
+if st.session_state.txns_active:
+    with profiler.stage("view: Transactions"):
+        st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
+        st.header(f"📋 All Transactions (Year filter: {st.session_state.global_year})")
+
+        # newest-first order is computed once per dataset/year; only the visible page is sent
+        table_key = (dataset_key, str(st.session_state.global_year))
+        if st.session_state.get("txn_table_key") != table_key:
+            st.session_state.txn_table = TransactionTable(
+                df_view, search_index=partial(ledger_search_index, df_view, dataset_key, view_year))
+            st.session_state.txn_table_key = table_key
+        table = st.session_state.txn_table
+
+        f1, f2, f3 = st.columns([3, 3, 1])
+        txn_query = f1.text_input("Search description / category (words match by prefix)", key="txn_search")
+        txn_cats = f2.multiselect("Category", options=table.categories, key="txn_categories")
+        page_size = f3.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(100), key="txn_page_size")
+        rows = table.filter(txn_query, txn_cats)
+
+        n_pages = max(1, -(-len(rows) // page_size))
+        filter_sig = (table_key, txn_query, tuple(txn_cats), page_size)
+        if st.session_state.get("txn_filter_sig") != filter_sig or st.session_state.get("txn_page", 1) > n_pages:
+            st.session_state.txn_page = 1
+            st.session_state.txn_filter_sig = filter_sig
+        page = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="txn_page")
+        st.caption(f"{len(rows):,} of {len(table):,} transactions — page {page} of {n_pages}")
+        st.dataframe(table.page(rows, page, page_size), use_container_width=True)
+
+        # exports cover the rows matching the current search/filter
+        export_params = (view_year, txn_query.strip().lower(), tuple(sorted(txn_cats)))
+        export_button("transactions (CSV)", lambda: csv_bytes(table.export_frame(rows)), "transactions.csv",
+                      params=export_params, rows=len(rows))
+        export_button("transactions (Excel)", lambda: df_to_excel_bytes({"transactions": table.export_frame(rows)}),
+                      "transactions.xlsx", params=export_params, rows=len(rows))
+        st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------- Year Compare (sidebar triggered) -------------------------
 if st.session_state.compare_active and compare_years_btn:
-    if year_a == "Select" or year_b == "Select":
-        st.sidebar.error("Choose both Year A and Year B to compare.")
-    else:
-        try:
-            ya = int(year_a)
-            yb = int(year_b)
-            total_a = (yearly_income_full.loc[ya] if ya in yearly_income_full.index else 0) - (yearly_expense_full.loc[ya] if ya in yearly_expense_full.index else 0)
-            total_b = (yearly_income_full.loc[yb] if yb in yearly_income_full.index else 0) - (yearly_expense_full.loc[yb] if yb in yearly_expense_full.index else 0)
-            pctc = pct_change_str(total_b, total_a) if total_a != 0 else "N/A"
-
-            st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
-            st.header(f"📊 Year Comparison — {ya} vs {yb}")
-            ca, cb, cc = st.columns(3)
-            ca.metric(f"Total {ya}", f"₹{total_a:,.2f}")
-            cb.metric(f"Total {yb}", f"₹{total_b:,.2f}", pctc)
-            cc.markdown(f"**Difference:** ₹{(total_b - total_a):,.2f}")
-
-            cat_a = df[df["year"] == ya].groupby("category")["actual_amount"].sum()
-            cat_b = df[df["year"] == yb].groupby("category")["actual_amount"].sum()
-            comp_cat = pd.concat([cat_a, cat_b], axis=1).fillna(0)
-            comp_cat.columns = [str(ya), str(yb)]
-            st.markdown("### 🏷️ Category Comparison")
-            st.dataframe(comp_cat)
-            comp_cat_plot = comp_cat.reset_index().melt(id_vars='category', value_name='amount')
-            figy = px.bar(comp_cat_plot, x='category', y='amount', color='variable', barmode='group')
-            st.plotly_chart(figy, use_container_width=True)
-
-            year_compare_df = comp_cat.reset_index()
-            st.download_button("Download year compare (CSV)", year_compare_df.to_csv(index=False).encode(), file_name=f"year_compare_{ya}_vs_{yb}.csv")
-            excel_compare_bytes = df_to_excel_bytes({f"{ya}_vs_{yb}": year_compare_df})
-            if excel_compare_bytes:
-                st.download_button("Download year compare (Excel)", excel_compare_bytes, file_name="year_compare_{ya}_vs_{yb}.xlsx")
-            st.markdown("</div>", unsafe_allow_html=True)
-        except Exception as e:
-            st.error("Year compare failed: " + str(e))
+    with profiler.stage("view: Year Compare"):
+        if year_a == "Select" or year_b == "Select":
+            st.sidebar.error("Choose both Year A and Year B to compare.")
+        else:
+            try:
+                ya = int(year_a)
+                yb = int(year_b)
+                total_a = (yearly_income_full.loc[ya] if ya in yearly_income_full.index else 0) - (yearly_expense_full.loc[ya] if ya in yearly_expense_full.index else 0)
+                total_b = (yearly_income_full.loc[yb] if yb in yearly_income_full.index else 0) - (yearly_expense_full.loc[yb] if yb in yearly_expense_full.index else 0)
+                pctc = pct_change_str(total_b, total_a) if total_a != 0 else "N/A"
+
+                st.markdown('<div class="glass" style="margin-top:12px;padding-bottom:12px;">', unsafe_allow_html=True)
+                st.header(f"📊 Year Comparison — {ya} vs {yb}")
+                ca, cb, cc = st.columns(3)
+                ca.metric(f"Total {ya}", f"₹{total_a:,.2f}")
+                cb.metric(f"Total {yb}", f"₹{total_b:,.2f}", pctc)
+                cc.markdown(f"**Difference:** ₹{(total_b - total_a):,.2f}")
+
+                cat_a = net_by(slice_year(cube, ya), "category")
+                cat_b = net_by(slice_year(cube, yb), "category")
+                comp_cat = pd.concat([cat_a, cat_b], axis=1).fillna(0)
+                comp_cat.columns = [str(ya), str(yb)]
+                st.markdown("### 🏷️ Category Comparison")
+                st.dataframe(comp_cat)
+                comp_cat_plot = comp_cat.reset_index().melt(id_vars='category', value_name='amount')
+                figy = px.bar(comp_cat_plot, x='category', y='amount', color='variable', barmode='group')
+                st.plotly_chart(figy, use_container_width=True)
+
+                year_compare_df = comp_cat.reset_index()
+                export_button("year compare (CSV)", lambda: csv_bytes(year_compare_df), f"year_compare_{ya}_vs_{yb}.csv",
+                              rows=len(year_compare_df))
+                export_button("year compare (Excel)", lambda: df_to_excel_bytes({f"{ya}_vs_{yb}": year_compare_df}),
+                              f"year_compare_{ya}_vs_{yb}.xlsx", rows=len(year_compare_df))
+                st.markdown("</div>", unsafe_allow_html=True)
+            except Exception as e:
+                st.error("Year compare failed: " + str(e))
 
 # ------------------------- Footer -------------------------
-st.markdown("<div style='height:18px'></div>", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown("<div style='height:18px'></div>", unsafe_allow_html=True)
+
+# ------------------------- Diagnostics panel -------------------------
+if DIAGNOSTICS_ENABLED:
+    profiler.context.update(year_filter=str(st.session_state.global_year), compact_schema=COMPACT_SCHEMA)
+    with st.sidebar.expander("🩺 Diagnostics", expanded=False):
+        st.checkbox("Trace memory peaks (tracemalloc, slower)", key="diag_trace_memory")
+        st.caption(f"Rerun #{profiler.runs + 1} — stage timings for this rerun, then cumulative across reruns.")
+        st.dataframe(profiler.last_run_table(), use_container_width=True)
+        st.dataframe(profiler.totals_table(), use_container_width=True)
+        st.caption("Shared result cache (all sessions of this server).")
+        st.dataframe(pd.DataFrame([shared_results().metrics()]), use_container_width=True)
+        st.download_button("Download diagnostics (JSON)", profiler.to_json().encode(), file_name="finsight_diagnostics.json")
+        if st.button("Reset counters", key="diag_reset"):
+            profiler.reset()
\ No newline at end of file
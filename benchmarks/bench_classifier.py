@@ -0,0 +1,86 @@
+"""Benchmark: row-wise vs vectorized classify_transactions.
+
+Usage:
+    python benchmarks/bench_classifier.py [--sizes 10000 100000 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finsight.classify import INCOME_KEYWORDS, classify_transactions  # noqa: E402
+
+DESCRIPTIONS = [
+    "Salary credit ACME Corp", "Amazon purchase", "Swiggy order", "UPI transfer to landlord",
+    "Interest received", "Electricity bill", "Cashback reward", "Uber ride", "EMI home loan",
+    "Refund from Flipkart", "Netflix subscription", "ATM withdrawal",
+]
+CATEGORIES = ["income", "shopping", "food", "rent", "bills", "transport", "entertainment", "cash"]
+
+
+def legacy_classify_transactions(df, income_keywords=INCOME_KEYWORDS):
+    # the original row-wise implementation, kept as the "before" baseline
+    df = df.copy()
+    df['desc_clean'] = df['description'].astype(str).str.lower()
+    df['cat_clean'] = df['category'].astype(str).str.lower()
+
+    df['is_income'] = df['desc_clean'].apply(lambda x: any(k in x for k in income_keywords)) | \
+                      df['cat_clean'].apply(lambda x: any(k in x for k in income_keywords))
+
+    def compute_actual_amount(row):
+        amt = row['amount']
+        if pd.isna(amt):
+            return 0.0
+        if row['is_income']:
+            return abs(amt)
+        return -abs(amt)
+
+    df['actual_amount'] = df.apply(compute_actual_amount, axis=1)
+    return df
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D"),
+        "amount": rng.lognormal(6, 1.2, n).round(2),
+        "description": np.array(DESCRIPTIONS, dtype=object)[rng.integers(0, len(DESCRIPTIONS), n)],
+        "category": np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), n)],
+    })
+
+
+def best_time(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy rows/s':>15} {'vectorized rows/s':>18} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_frame(n)
+        old, new = legacy_classify_transactions(df), classify_transactions(df)
+        assert old['is_income'].equals(new['is_income'])
+        assert np.allclose(old['actual_amount'].astype(float), new['actual_amount'].astype(float))
+
+        # the legacy path is slow, so only repeat it on the small sizes
+        t_old = best_time(legacy_classify_transactions, df, args.repeat if n <= 100_000 else 1)
+        t_new = best_time(classify_transactions, df, args.repeat)
+        print(f"{n:>10,} {n / t_old:>15,.0f} {n / t_new:>18,.0f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: format-guessing pd.to_datetime vs inferred explicit-format date parsing.
+
+For each bank date format, a synthetic column is parsed both ways; the report
+shows throughput and how many dates each way gets wrong (NaT or misread). An
+ISO8601 column with mixed UTC offsets checks that those parse as wall-clock time.
+
+Usage:
+    python benchmarks/bench_dates.py [--sizes 100000 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finsight.dates import DateParser  # noqa: E402
+
+FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%m/%d/%Y", "%m-%d-%Y", "%d.%m.%Y", "%d-%b-%Y"]
+# ISO8601 timestamps whose UTC offsets differ from row to row (read as wall-clock time)
+OFFSETS = ["+05:30", "+00:00", "-04:00", "Z"]
+
+
+def legacy_parse(values):
+    # the previous normalize_frame call, kept as the "before" baseline
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # "could not infer format" on day-first columns
+        return pd.to_datetime(values, errors="coerce")
+
+
+def new_parse(values):
+    return DateParser()(values)
+
+
+def make_dates(n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 3 * 365, n)
+    seconds = rng.integers(0, 86_400, n)
+    stamps = pd.Timestamp("2023-01-01") + pd.to_timedelta(days, unit="D") + pd.to_timedelta(seconds, unit="s")
+    # statements are chronological, so the first date (the one pandas guesses from) is ambiguous
+    return pd.Series(stamps).sort_values(ignore_index=True)
+
+
+def with_offsets(stamps):
+    offsets = np.array(OFFSETS, dtype=object)[np.arange(len(stamps)) % len(OFFSETS)]
+    return stamps.dt.strftime("%Y-%m-%dT%H:%M:%S") + offsets
+
+
+def cases(stamps):
+    """(label, values, expected dates) per benchmarked column."""
+    for fmt in FORMATS:
+        values = stamps.dt.strftime(fmt)
+        yield fmt, values, pd.to_datetime(values, format=fmt).to_numpy()
+    yield "ISO8601 offsets", with_offsets(stamps), stamps.to_numpy()
+
+
+def count_wrong(fn, values, truth):
+    try:
+        parsed = pd.to_datetime(fn(values), errors="coerce")
+    except (ValueError, TypeError):
+        return len(values)  # no datetime column at all (e.g. "Mixed timezones detected")
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        parsed = parsed.dt.tz_localize(None)
+    return int((parsed.to_numpy() != truth).sum())
+
+
+def best_time(fn, values, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        try:
+            fn(values)
+        except (ValueError, TypeError):
+            return float("nan")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':<18} {'legacy rows/s':>14} {'new rows/s':>12} {'speedup':>8} "
+          f"{'legacy wrong':>13} {'new wrong':>10}")
+    for n in args.sizes:
+        stamps = make_dates(n)
+        for fmt, values, truth in cases(stamps):
+            wrong_old = count_wrong(legacy_parse, values, truth)
+            wrong_new = count_wrong(new_parse, values, truth)
+            t_old = best_time(legacy_parse, values, args.repeat)
+            t_new = best_time(new_parse, values, args.repeat)
+            print(f"{n:>10,} {fmt:<18} {n / t_old:>14,.0f} {n / t_new:>12,.0f} {t_old / t_new:>7.1f}x "
+                  f"{wrong_old:>13,} {wrong_new:>10,}")
+
+
+if __name__ == "__main__":
+    main()
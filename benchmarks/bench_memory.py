@@ -0,0 +1,36 @@
+"""Memory report: bytes per row of the full vs compact transaction schema.
+
+Usage:
+    python benchmarks/bench_memory.py [statement.csv] [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_classifier import make_frame  # noqa: E402
+from finsight.ingest import load_ledger  # noqa: E402
+from finsight.schema import memory_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", help="statement file (default: synthetic ledger)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic ledger size")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.csv")
+        make_frame(args.rows).to_csv(path, index=False)
+
+    full = load_ledger(path)
+    compact = load_ledger(path, compact=True)
+    print(f"{len(full):,} rows from {path}\n")
+    print(memory_report(full, compact).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Benchmark: every pipeline stage on synthetic ledgers of growing size.
+
+Times file ingestion (process_uploaded_file), PDF extraction, classification,
+the dashboard's derived stats, Isolation Forest and K-Means at each size and
+records each stage's peak memory above its starting point. On Linux this is
+resident memory sampled from /proc (native allocations included); elsewhere it
+is the tracemalloc peak from a separate run. Results are written as JSON; pass
+an earlier results file with --compare to see the change per stage.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 1000 100000 1000000] [--out bench_pipeline.json]
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 --compare bench_pipeline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import sklearn  # noqa: E402
+
+from synthetic import make_ledger, write_statement_pdf  # noqa: E402
+from finsight.aggregates import build_cube, net_by  # noqa: E402
+from finsight.anomaly import AnomalyModel  # noqa: E402
+from finsight.classify import classify_transactions  # noqa: E402
+from finsight.clustering import MINIBATCH_MIN_ROWS, TransactionClusterer  # noqa: E402
+from finsight.ingest import process_uploaded_file  # noqa: E402
+from finsight.pdf_extract import available_cpus, extract_transactions_from_pdf  # noqa: E402
+from finsight.reports import headline_metrics, monthly_summary  # noqa: E402
+
+STATM = "/proc/self/statm"
+PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2**20 if hasattr(os, "sysconf") else 0
+MEMORY_METHOD = "rss" if os.path.exists(STATM) else "tracemalloc"
+
+
+def derived_stats(df):
+    # what the dashboard computes before rendering any view
+    cube = build_cube(df)
+    metrics = headline_metrics(cube)
+    monthly_summary(metrics["monthly_income"], metrics["monthly_expense"])
+    net_by(cube, "category")
+    return cube
+
+
+def kmeans(df, k=3):
+    clusterer = TransactionClusterer(df)
+    return clusterer.labels(k)
+
+
+def _rss_mb():
+    with open(STATM) as fh:
+        return int(fh.read().split()[1]) * PAGE_MB
+
+
+class RssSampler:
+    """Peak resident memory above the starting point, sampled on a background thread."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._base = _rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_mb() - self._base)
+            self._stop.wait(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_mb() - self._base)
+
+
+def measure(fn, repeat, track_memory):
+    """(result, best seconds over repeat runs, peak MB above the start or None)."""
+    peak = None
+    if track_memory and MEMORY_METHOD == "tracemalloc":
+        # separate traced run: tracemalloc slows Python-heavy stages, so it is kept out of the timings
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    best, result = float("inf"), None
+    for i in range(repeat):
+        sampler = RssSampler() if track_memory and MEMORY_METHOD == "rss" and i == 0 else None
+        t0 = time.perf_counter()
+        if sampler is not None:
+            with sampler:
+                result = fn()
+            peak = sampler.peak
+        else:
+            result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best, peak
+
+
+def run_size(n, workdir, args):
+    results = []
+
+    def record(stage, fn, note=""):
+        result, seconds, peak = measure(fn, args.repeat, not args.no_memory)
+        results.append({
+            "stage": stage, "rows": n, "seconds": round(seconds, 4),
+            "rows_per_s": round(n / seconds) if seconds else None,
+            "peak_mb": round(peak, 1) if peak is not None else None, "note": note,
+        })
+        print(f"{stage:<32} {n:>10,} {seconds:>9.3f}s {results[-1]['peak_mb'] or '-':>9} MB  {note}", flush=True)
+        return result
+
+    ledger = make_ledger(n, seed=args.seed)
+    csv_path = os.path.join(workdir, f"ledger-{n}.csv")
+    ledger.to_csv(csv_path, index=False)
+
+    df = record("process_uploaded_file", lambda: process_uploaded_file(csv_path))
+
+    if n <= args.pdf_max_rows:
+        pdf_path = os.path.join(workdir, f"statement-{n}.pdf")
+        write_statement_pdf(pdf_path, ledger)
+        record("extract_transactions_from_pdf",
+               lambda: extract_transactions_from_pdf(pdf_path, max_workers=args.pdf_workers),
+               note="peak_mb excludes PDF worker processes")
+    else:
+        results.append({"stage": "extract_transactions_from_pdf", "rows": n, "seconds": None,
+                        "rows_per_s": None, "peak_mb": None, "note": f"skipped (> --pdf-max-rows {args.pdf_max_rows})"})
+        print(f"{'extract_transactions_from_pdf':<32} {n:>10,} {'skipped':>10}", flush=True)
+
+    df = record("classify_transactions", lambda: classify_transactions(df))
+    record("derived_stats", lambda: derived_stats(df))
+    record("isolation_forest", lambda: AnomalyModel().fit(df))
+    record("kmeans", lambda: kmeans(df), note="MiniBatchKMeans" if len(df) >= MINIBATCH_MIN_ROWS else "KMeans")
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def compare(old_path, results, tolerance):
+    with open(old_path) as fh:
+        old = {(r["stage"], r["rows"]): r for r in json.load(fh)["results"]}
+    print(f"\n{'stage':<32} {'rows':>10} {'before':>9} {'after':>9} {'change':>8}")
+    for r in results:
+        before = old.get((r["stage"], r["rows"]))
+        if not before or not before["seconds"] or not r["seconds"]:
+            continue
+        ratio = r["seconds"] / before["seconds"]
+        flag = "  slower" if ratio > 1 + tolerance else ("  faster" if ratio < 1 - tolerance else "")
+        print(f"{r['stage']:<32} {r['rows']:>10,} {before['seconds']:>8.3f}s {r['seconds']:>8.3f}s {ratio:>7.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-max-rows", type=int, default=10_000,
+                        help="largest ledger rendered to PDF (50 rows per page)")
+    parser.add_argument("--pdf-workers", type=int, default=None, help="PDF extraction processes (default: one per CPU)")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak-memory tracking")
+    parser.add_argument("--out", default="bench_pipeline.json", help="results file (default: %(default)s)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change flagged by --compare")
+    args = parser.parse_args()
+
+    print(f"{'stage':<32} {'rows':>10} {'time':>10} {'peak':>9}")
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            results.extend(run_size(n, workdir, args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": available_cpus(),
+            "versions": {"pandas": pd.__version__, "numpy": np.__version__, "sklearn": sklearn.__version__},
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "memory_method": None if args.no_memory else MEMORY_METHOD,
+            "max_rss_mb": max_rss_mb(),
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nresults written to {args.out}")
+
+    if args.compare:
+        compare(args.compare, results, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: dashboard cold start (import time and time to first render).
+
+Every run is a fresh interpreter, so nothing is imported yet. It times importing
+streamlit, then the import block at the top of app.py, then the app's first
+script run (page, header and uploader rendered through streamlit's AppTest). It
+also lists which of the heavy libraries that should only load on demand were
+imported by then. With --check the exit status is 1 if any of them was, or if
+the median time to first render is over --max-first-render seconds, so startup
+regressions fail CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5]
+    python benchmarks/bench_startup.py --check --max-first-render 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+# loaded on demand: PDF uploads, AI Intelligence / categorization, charts, PDF reports
+LAZY_MODULES = ["pdfplumber", "sklearn", "plotly.express", "reportlab"]
+METRICS = ["streamlit_import_s", "app_imports_s", "first_run_s", "first_render_s"]
+
+# runs in a fresh interpreter: argv = app path, then the lazy module names
+CHILD = r"""
+import ast, json, os, sys, time
+
+app, lazy = sys.argv[1], sys.argv[2:]
+sys.path.insert(0, os.path.dirname(app))
+start = time.perf_counter()
+import streamlit
+streamlit_s = time.perf_counter() - start
+from streamlit.testing.v1 import AppTest
+
+# the leading import statements of app.py, as the script runs them
+imports = []
+for node in ast.parse(open(app, encoding="utf-8").read()).body:
+    if not isinstance(node, (ast.Import, ast.ImportFrom)):
+        break
+    imports.append(node)
+start = time.perf_counter()
+exec(compile(ast.Module(body=imports, type_ignores=[]), app, "exec"), {})
+imports_s = time.perf_counter() - start
+
+start = time.perf_counter()
+at = AppTest.from_file(app, default_timeout=120).run()
+run_s = time.perf_counter() - start
+print(json.dumps({
+    "streamlit_import_s": streamlit_s,
+    "app_imports_s": imports_s,
+    "first_run_s": run_s,
+    "first_render_s": streamlit_s + imports_s + run_s,
+    "loaded": [m for m in lazy if m in sys.modules],
+    "errors": [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def cold_start():
+    out = subprocess.run([sys.executable, "-c", CHILD, APP] + LAZY_MODULES, capture_output=True, text=True,
+                         cwd=ROOT, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to time (median reported)")
+    parser.add_argument("--check", action="store_true", help="exit 1 on an eager heavy import or a slow first render")
+    parser.add_argument("--max-first-render", type=float, default=5.0,
+                        help="--check budget for the median time to first render, in seconds")
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.repeat)]
+    print(f"{'metric':<20}{'median':>10}{'min':>10}{'max':>10}")
+    for metric in METRICS:
+        values = [r[metric] for r in runs]
+        print(f"{metric:<20}{statistics.median(values):>10.3f}{min(values):>10.3f}{max(values):>10.3f}")
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    errors = sorted({e for r in runs for e in r["errors"]})
+    print(f"\nloaded before first render: {', '.join(loaded) or 'none of ' + ', '.join(LAZY_MODULES)}")
+    if errors:
+        print(f"first run raised: {'; '.join(errors)}")
+
+    if args.check:
+        first_render = statistics.median(r["first_render_s"] for r in runs)
+        failures = []
+        if loaded:
+            failures.append(f"imported at startup: {', '.join(loaded)}")
+        if errors:
+            failures.append("first run raised an exception")
+        if first_render > args.max_first_render:
+            failures.append(f"first render {first_render:.2f}s > {args.max_first_render:.2f}s")
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Synthetic ledgers and statement PDFs for the benchmarks.
+
+Transactions are drawn from spending profiles (category, merchant descriptions,
+frequency and a log-normal amount) so the income keywords, category mix, amount
+spread and multi-year date span look like a real bank export. Amounts are
+positive, as in the exports the app ingests; classification decides the sign.
+
+Usage:
+    python benchmarks/synthetic.py out.csv --rows 100000
+    python benchmarks/synthetic.py out.pdf --rows 5000
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# (category, descriptions, share of transactions, log-mean, log-sigma of the amount)
+PROFILES = [
+    ("salary", ["Salary credit ACME Corp", "Salary credit Globex Ltd"], 0.03, 11.0, 0.15),
+    ("interest", ["Interest received SB account", "FD interest deposit"], 0.02, 6.5, 0.8),
+    ("refund", ["Refund from Flipkart", "Amazon refund", "Cashback reward"], 0.04, 6.0, 1.0),
+    ("food", ["Swiggy order", "Zomato order", "Starbucks coffee", "Dominos pizza"], 0.22, 6.0, 0.6),
+    ("shopping", ["Amazon purchase", "Flipkart order", "Myntra order", "DMart groceries"], 0.18, 7.0, 1.0),
+    ("transport", ["Uber ride", "Ola ride", "Metro card recharge", "Fuel HPCL"], 0.13, 5.5, 0.7),
+    ("bills", ["Electricity bill", "Mobile recharge Airtel", "Broadband bill", "Gas cylinder"], 0.10, 7.0, 0.5),
+    ("rent", ["UPI transfer to landlord"], 0.03, 10.0, 0.1),
+    ("entertainment", ["Netflix subscription", "Spotify premium", "BookMyShow tickets"], 0.07, 6.0, 0.5),
+    ("emi", ["EMI home loan", "EMI car loan"], 0.03, 9.5, 0.2),
+    ("cash", ["ATM withdrawal"], 0.09, 8.0, 0.5),
+    ("health", ["Apollo pharmacy", "Clinic consultation"], 0.06, 6.5, 0.7),
+]
+
+
+def make_ledger(n, seed=0, years=3, end="2025-12-31", ref_share=0.25, date_format="%Y-%m-%d"):
+    """Random bank export with n rows (date, description, amount, category), oldest first.
+
+    ``ref_share`` of the descriptions get a UPI reference suffix, so that not
+    every description repeats.
+    """
+    rng = np.random.default_rng(seed)
+    shares = np.array([p[2] for p in PROFILES])
+    profile = rng.choice(len(PROFILES), size=n, p=shares / shares.sum())
+
+    descriptions = np.empty(n, dtype=object)
+    categories = np.empty(n, dtype=object)
+    amounts = np.empty(n)
+    for i, (category, descs, _, mu, sigma) in enumerate(PROFILES):
+        rows = np.flatnonzero(profile == i)
+        descriptions[rows] = np.array(descs, dtype=object)[rng.integers(0, len(descs), len(rows))]
+        categories[rows] = category
+        amounts[rows] = rng.lognormal(mu, sigma, len(rows)).round(2)
+
+    refs = np.flatnonzero(rng.random(n) < ref_share)
+    descriptions[refs] = descriptions[refs] + " UPI/" + rng.integers(100000, 999999, len(refs)).astype(str).astype(object)
+
+    end_ts = pd.Timestamp(end)
+    span = (end_ts - (end_ts - pd.DateOffset(years=years))).days
+    dates = np.sort(end_ts - pd.to_timedelta(rng.integers(0, span, n), unit="D"))
+    return pd.DataFrame({
+        "date": pd.DatetimeIndex(dates).strftime(date_format),
+        "description": descriptions,
+        "amount": amounts,
+        "category": categories,
+    })
+
+
+def write_statement_pdf(path, ledger, rows_per_page=50):
+    """Render a ledger as a text statement PDF ("date description amount category" per line)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=A4)
+    lines = (ledger["date"] + " " + ledger["description"] + " "
+             + ledger["amount"].map("{:,.2f}".format) + " " + ledger["category"]).tolist()
+    for page, start in enumerate(range(0, max(len(lines), 1), rows_per_page)):
+        y = 800
+        c.drawString(40, y, f"Account statement - page {page + 1}")
+        for line in lines[start:start + rows_per_page]:
+            y -= 14
+            c.drawString(40, y, line)
+        c.showPage()
+    c.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="output file (.csv, .xlsx or .pdf)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ledger = make_ledger(args.rows, seed=args.seed, years=args.years)
+    ext = os.path.splitext(args.path)[1].lower()
+    if ext == ".pdf":
+        write_statement_pdf(args.path, ledger)
+    elif ext == ".xlsx":
+        ledger.to_excel(args.path, index=False)
+    else:
+        ledger.to_csv(args.path, index=False)
+    print(f"wrote {len(ledger):,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
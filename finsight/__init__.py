@@ -0,0 +1,5 @@
+"""FinSight Pro analytics engine.
+
+Parsing, classification and analytics helpers that do not depend on Streamlit,
+so they can be imported by app.py, benchmarks and batch jobs alike.
+"""
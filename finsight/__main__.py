@@ -0,0 +1,3 @@
+from finsight.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Precomputed (year, month, category, sign) aggregate cube for the dashboard views.
+
+The cube is built once per dataset; every view slices it instead of re-grouping
+the transaction frame, so work scales with the number of cells, not transactions.
+Each cell also keeps ``m2``, the sum of squared deviations of its amounts from
+their mean, so per-cell variances survive merging cubes (Chan et al.'s
+parallel form of Welford's update).
+"""
+import numpy as np
+import pandas as pd
+
+from finsight.schema import is_compact_month, ordinals_to_periods
+
+CUBE_KEYS = ["year", "month", "category", "sign"]
+
+
+def build_cube(df):
+    """Sum, count and m2 of actual_amount per (year, month, category, sign) cell.
+
+    Accepts both the full and the compact schema; the cube always carries a
+    monthly Period ``month`` and string ``category``.
+    """
+    sign = np.sign(df["actual_amount"]).astype("int8")
+    grouped = df.assign(sign=sign).groupby(CUBE_KEYS, observed=True, sort=True)["actual_amount"]
+    cube = grouped.agg(total="sum", count="size").reset_index()
+    cube["m2"] = grouped.var(ddof=0).to_numpy() * cube["count"].to_numpy()
+    if is_compact_month(cube["month"]):
+        cube["month"] = ordinals_to_periods(cube["month"].to_numpy())
+    cube["category"] = cube["category"].astype(str)
+    return cube
+
+
+def slice_year(cube, year=None):
+    if year is None:
+        return cube
+    return cube[cube["year"] == year]
+
+
+def slice_months(cube, months):
+    return cube[cube["month"].astype(str).isin([str(m) for m in months])]
+
+
+def income_expense_totals(cube):
+    """(income, expense) over the cube, both positive."""
+    income = cube.loc[cube["sign"] > 0, "total"].sum()
+    expense = cube.loc[cube["sign"] < 0, "total"].abs().sum()
+    return income, expense
+
+
+def income_expense_by(cube, key):
+    """Income and expense Series (both positive) indexed by key over the union of keys."""
+    income = cube[cube["sign"] > 0].groupby(key, observed=True)["total"].sum()
+    expense = cube[cube["sign"] < 0]["total"].abs().groupby(cube[key], observed=True).sum()
+    index = sorted(set(income.index.tolist()) | set(expense.index.tolist()))
+    return income.reindex(index, fill_value=0), expense.reindex(index, fill_value=0)
+
+
+def net_by(cube, key):
+    """Net actual_amount (income positive, expense negative) grouped by key(s)."""
+    return cube.groupby(key, observed=True)["total"].sum().rename("actual_amount")
+
+
+def category_abs_totals(cube):
+    """Per-category sum of absolute amounts, largest first."""
+    return (
+        cube.assign(amount_positive=cube["total"].abs())
+        .groupby("category", observed=True)["amount_positive"]
+        .sum()
+        .sort_values(ascending=False)
+    )
+
+
+def months_available(cube):
+    return sorted(cube["month"].astype(str).unique())
+
+
+def merge_cubes(*cubes):
+    """Cube of the union of the cubes' (disjoint) transactions."""
+    cubes = [c for c in cubes if c is not None and len(c)]
+    if not cubes:
+        return None
+    if len(cubes) == 1:
+        return cubes[0]
+    cells = pd.concat(cubes, ignore_index=True)
+    grouped = cells.groupby(CUBE_KEYS, observed=True, sort=True)
+    # m2 of a merged cell: each part's m2 plus its count times its mean's squared distance from the merged mean
+    merged_mean = grouped["total"].transform("sum") / grouped["count"].transform("sum")
+    cells["m2"] += cells["count"] * (cells["total"] / cells["count"] - merged_mean) ** 2
+    merged = (
+        cells.groupby(CUBE_KEYS, observed=True, sort=True)
+        .agg(total=("total", "sum"), count=("count", "sum"), m2=("m2", "sum"))
+        .reset_index()
+    )
+    return merged.astype(cubes[0].dtypes.to_dict())
@@ -0,0 +1,202 @@
+"""Isolation Forest anomaly scoring with cached, re-thresholdable scores.
+
+IsolationForest's trees do not depend on ``contamination``; it only sets the
+score percentile used as the decision offset. Models are therefore fitted once
+per (dataset, view, feature config) and contamination changes just re-threshold
+the cached raw scores, giving exactly the labels a refit would.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ANOMALY_TOP_CATEGORIES = 8
+MIN_ROWS = 5
+ROW_KEY_COLUMNS = ["date", "description", "actual_amount", "category"]
+TABLE_COLUMNS = ["date", "description", "actual_amount", "category", "anomaly_score"]
+
+
+def row_hashes(df):
+    """uint64 fingerprint per transaction, used to recognise rows across uploads."""
+    keys = df[ROW_KEY_COLUMNS].astype({"description": str, "category": str})
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def threshold_scores(raw, contamination):
+    """(labels, decision scores) for a contamination level, as IsolationForest.predict would give."""
+    offset = np.percentile(raw, 100.0 * contamination)
+    scores = raw - offset
+    return np.where(scores < 0, -1, 1), scores
+
+
+def label_anomalies(df, raw, contamination):
+    """Copy of df (fresh index) with anomaly (-1/1) and anomaly_score columns."""
+    preds, scores = threshold_scores(raw, contamination)
+    return df.reset_index(drop=True).assign(anomaly=preds, anomaly_score=scores)
+
+
+def anomaly_table(labelled):
+    """Flagged rows of a label_anomalies frame, most anomalous first."""
+    return labelled.loc[labelled["anomaly"] == -1, TABLE_COLUMNS].sort_values(by="anomaly_score")
+
+
+class AnomalyModel:
+    """Scaler + IsolationForest over amount, day, month and top-category dummies."""
+
+    def __init__(self, use_abs=True, top_n=ANOMALY_TOP_CATEGORIES, random_state=42):
+        self.use_abs = use_abs
+        self.top_n = top_n
+        self.random_state = random_state
+        self.top_cats = None
+        self.columns = None
+        self.scaler = None
+        self.iso = None
+
+    def features(self, df):
+        amt = df["actual_amount"].abs() if self.use_abs else df["actual_amount"]
+        cats = df["category"].astype(str)
+        trimmed = cats.where(cats.isin(self.top_cats), other="__other__")
+        feats = pd.concat([
+            pd.DataFrame({
+                "amt_feat": amt.to_numpy(),
+                "day": df["date"].dt.day.to_numpy(),
+                "month_num": df["date"].dt.month.to_numpy(),
+            }),
+            pd.get_dummies(trimmed.reset_index(drop=True), prefix="cat"),
+        ], axis=1)
+        if self.columns is not None:
+            feats = feats.reindex(columns=self.columns, fill_value=False)
+        return feats
+
+    def fit(self, df):
+        """Fit on df and return its raw scores (IsolationForest.score_samples)."""
+        # sklearn takes most of a cold start to import, so it loads on the first fit
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
+        self.top_cats = df["category"].astype(str).value_counts().nlargest(self.top_n).index.tolist()
+        feats = self.features(df)
+        self.columns = feats.columns.tolist()
+        self.scaler = StandardScaler()
+        X = self.scaler.fit_transform(feats)
+        self.iso = IsolationForest(random_state=self.random_state)
+        self.iso.fit(X)
+        return self.iso.score_samples(X)
+
+    def score_samples(self, df):
+        return self.iso.score_samples(self.scaler.transform(self.features(df)))
+
+
+class _Entry:
+    def __init__(self, dataset_key, model, hashes, raw):
+        self.dataset_key = dataset_key
+        self.model = model
+        self.hashes = hashes
+        self.raw = raw
+
+
+class AnomalyScoreCache:
+    """LRU of fitted anomaly models and their raw scores.
+
+    Entries are keyed by (dataset key, view key, feature config). When a dataset
+    misses but extends a cached one for the same view and config (every row the
+    model scored is still present), the saved model is reused and only the new
+    rows are scored. With ``cache_dir`` set, the latest model per view/config is
+    also persisted with joblib so later sessions can extend it. Safe to call
+    from background threads; concurrent fits are serialized.
+    """
+
+    def __init__(self, max_entries=4, cache_dir=""):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "fits": 0, "extensions": 0}
+
+    def raw_scores(self, df, dataset_key, view_key, use_abs=True, top_n=ANOMALY_TOP_CATEGORIES):
+        with self._lock:
+            return self._raw_scores(df, dataset_key, view_key, use_abs, top_n)
+
+    def _raw_scores(self, df, dataset_key, view_key, use_abs, top_n):
+        config = (bool(use_abs), int(top_n))
+        key = (dataset_key, view_key, config)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._entries[key].raw
+
+        hashes = row_hashes(df)
+        base = self._find_base(view_key, config, dataset_key, hashes)
+        if base is not None and base.dataset_key == dataset_key:
+            entry = base
+            self.stats["hits"] += 1
+        else:
+            if base is not None:
+                entry = _Entry(dataset_key, base.model, hashes, self._extend(base, df, hashes))
+                self.stats["extensions"] += 1
+            else:
+                model = AnomalyModel(use_abs=use_abs, top_n=top_n)
+                entry = _Entry(dataset_key, model, hashes, model.fit(df))
+                self.stats["fits"] += 1
+            self._save(view_key, config, entry)
+
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry.raw
+
+    @staticmethod
+    def _extend(base, df, hashes):
+        # reuse scores of rows the model has already seen; score only the new ones
+        order = np.argsort(base.hashes, kind="stable")
+        known_hashes = base.hashes[order]
+        pos = np.minimum(np.searchsorted(known_hashes, hashes), len(known_hashes) - 1)
+        known = known_hashes[pos] == hashes
+        raw = np.empty(len(df))
+        raw[known] = base.raw[order[pos[known]]]
+        if not known.all():
+            raw[~known] = base.model.score_samples(df[~known])
+        return raw
+
+    def _find_base(self, view_key, config, dataset_key, hashes):
+        candidates = [e for (_, v, c), e in reversed(self._entries.items()) if v == view_key and c == config]
+        for entry in candidates + [self._load(view_key, config)]:
+            if entry is None:
+                continue
+            if entry.dataset_key == dataset_key:
+                return entry
+            if len(entry.hashes) and np.isin(entry.hashes, hashes).all():
+                return entry
+        return None
+
+    def _path(self, view_key, config):
+        digest = hashlib.sha256(repr((view_key, config)).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"anomaly-{digest}.joblib")
+
+    def _load(self, view_key, config):
+        if not self.cache_dir:
+            return None
+        path = self._path(view_key, config)
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception:
+            return None
+
+    def _save(self, view_key, config, entry):
+        if not self.cache_dir:
+            return
+        path = self._path(view_key, config)
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            joblib.dump(entry, tmp)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
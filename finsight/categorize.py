@@ -0,0 +1,167 @@
+"""Learned categories for transactions that arrive without one.
+
+CSVs without a category column are "Uncategorized" and statement PDFs take
+whatever the line's last word is, so many rows carry no usable category. A
+linear classifier over character n-grams of the description (hashed into a
+fixed-width sparse matrix, TF-IDF weighted) is trained on the rows that do
+have one and predicts the rest in one batch. Descriptions are normalized like
+merchants (digits and reference numbers dropped) and repeat heavily, so
+training and prediction both run on distinct descriptions, weighted by how
+often they occur, and map back to rows. Character n-grams never cross a word
+boundary, so each distinct word is hashed once and a description's features
+are the sum of its words' (one sparse product): a million rows cost a few
+seconds.
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from finsight.recurring import merchant_keys
+
+# category values that mean "no category" (compared lower-cased and stripped)
+UNLABELLED_CATEGORIES = {"", "uncategorized", "uncategorised", "unknown", "nan", "none", "null", "n/a", "na", "-"}
+# a statement's credit/debit column ends up as the category of PDF rows
+CREDIT_DEBIT_MARKERS = {"cr", "dr", "cr.", "dr."}
+HASH_FEATURES = 2**18
+NGRAM_RANGE = (2, 4)
+MIN_TRAINING_ROWS = 20
+MAX_TRAINING_DOCUMENTS = 100_000  # the most frequent (description, category) pairs are trained on
+MIN_CONFIDENCE = 0.5  # predictions less likely than this keep the row's original category
+
+
+def unlabelled_mask(categories):
+    """Boolean mask of category values that carry no category (placeholders, Cr/Dr, no letters at all)."""
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        uniques = categories.cat.categories.to_series().astype(str)
+        missing = _unlabelled(uniques).to_numpy()
+        codes = categories.cat.codes.to_numpy()
+        return np.where(codes >= 0, missing[codes], True)
+    codes, uniques = pd.factorize(categories)
+    missing = _unlabelled(pd.Series(uniques, dtype=object).astype(str)).to_numpy()
+    return np.where(codes >= 0, missing[codes], True)
+
+
+def _unlabelled(values):
+    text = values.str.strip().str.lower()
+    # any letter, in any script, makes a label ("TV", "GST 5%", "食品"); amounts and balances have none
+    return (text.isin(UNLABELLED_CATEGORIES) | text.isin(CREDIT_DEBIT_MARKERS)
+            | ~text.str.contains(r"[^\W\d_]", regex=True))
+
+
+def _documents(descriptions):
+    """(codes, normalized distinct descriptions); the normalization runs once per distinct value."""
+    if isinstance(descriptions.dtype, pd.CategoricalDtype):
+        codes, uniques = descriptions.cat.codes.to_numpy(), descriptions.cat.categories.to_series()
+    else:
+        codes, uniques = pd.factorize(descriptions)
+        uniques = pd.Series(uniques)
+    keys = merchant_keys(uniques).to_numpy(dtype=object)
+    key_codes, documents = pd.factorize(keys)
+    return np.where(codes >= 0, key_codes[codes], -1), np.asarray(documents, dtype=object)
+
+
+class CategoryModel:
+    """Hashed character n-gram TF-IDF features with a linear (logistic SGD) classifier."""
+
+    def __init__(self):
+        # loaded with the first model rather than with the app; unlabelled_mask() needs none of it
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+        from sklearn.linear_model import SGDClassifier
+
+        self.vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=NGRAM_RANGE, n_features=HASH_FEATURES,
+                                            alternate_sign=False, norm=None)
+        self.tfidf = TfidfTransformer(sublinear_tf=True)
+        self.classifier = SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=100, tol=1e-3, random_state=0)
+        self.trained_rows = 0
+
+    def _features(self, documents):
+        """TF-IDF rows for documents: hashed n-grams of their distinct words, summed per document."""
+        from scipy.sparse import csr_matrix
+
+        words = pd.Series(documents, dtype=object).str.split().explode()
+        word_codes, vocab = pd.factorize(words.to_numpy(dtype=object))  # empty documents: code -1
+        found = word_codes >= 0
+        counts = csr_matrix((np.ones(found.sum()), (words.index.to_numpy()[found], word_codes[found])),
+                            shape=(len(documents), len(vocab)))
+        return counts @ self.vectorizer.transform(np.asarray(vocab, dtype=object))
+
+    def fit(self, descriptions, categories):
+        """Train on labelled rows (descriptions and their categories), one sample per distinct pair."""
+        doc_codes, documents = _documents(descriptions)
+        label_codes, labels = pd.factorize(pd.Series(categories, dtype=object).astype(str).to_numpy())
+        pairs, counts = np.unique(doc_codes.astype(np.int64) * len(labels) + label_codes, return_counts=True)
+        pairs, counts = pairs[pairs >= 0], counts[pairs >= 0]
+        if len(pairs) > MAX_TRAINING_DOCUMENTS:
+            top = np.argsort(-counts, kind="stable")[:MAX_TRAINING_DOCUMENTS]
+            pairs, counts = pairs[top], counts[top]
+        X = self.tfidf.fit_transform(self._features(documents[pairs // len(labels)]))
+        self.classifier.fit(X, np.asarray(labels, dtype=object)[pairs % len(labels)], sample_weight=counts / counts.mean())
+        self.classifier.sparsify()  # only n-grams seen in training have weights; keeps saved models small
+        self.trained_rows = int(counts.sum())
+        return self
+
+    def predict(self, descriptions):
+        """(category, probability) per row, computed once per distinct normalized description."""
+        doc_codes, documents = _documents(descriptions)
+        probabilities = self.classifier.predict_proba(self.tfidf.transform(self._features(documents)))
+        best = probabilities.argmax(axis=1)
+        labels = self.classifier.classes_[best]
+        confidence = probabilities[np.arange(len(best)), best]
+        found = doc_codes >= 0
+        return (np.where(found, labels[np.maximum(doc_codes, 0)], None),
+                np.where(found, confidence[np.maximum(doc_codes, 0)], 0.0))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        joblib.dump(self, tmp, compress=3)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """The model saved at path, or None if there is none (or it can't be read)."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            model = joblib.load(path)
+        except Exception:
+            return None
+        return model if isinstance(model, cls) else None
+
+
+def enough_labels(categories, counts=None):
+    """Whether categories (one per row, or per cube cell with its row counts) are enough to train on."""
+    labelled = ~unlabelled_mask(categories)
+    rows = labelled.sum() if counts is None else np.asarray(counts)[labelled].sum()
+    return bool(rows >= MIN_TRAINING_ROWS and categories[labelled].astype(str).nunique() >= 2)
+
+
+def train_categorizer(df):
+    """CategoryModel trained on df's labelled rows, or None if there are too few rows or categories."""
+    if not enough_labels(df["category"]):
+        return None
+    labelled = ~unlabelled_mask(df["category"])
+    return CategoryModel().fit(df["description"][labelled], df["category"][labelled])
+
+
+def categorize(df, model, min_confidence=MIN_CONFIDENCE):
+    """(copy of df with unlabelled rows' categories predicted by model, number of rows filled)."""
+    missing = np.flatnonzero(unlabelled_mask(df["category"]))
+    if model is None or not len(missing):
+        return df, 0
+    labels, confidence = model.predict(df["description"].iloc[missing])
+    sure = confidence >= min_confidence
+    rows, labels = missing[sure], labels[sure]
+    if not len(rows):
+        return df, 0
+    out = df.copy()
+    category = out["category"].astype(object).to_numpy(copy=True)
+    category[rows] = labels
+    category = pd.Series(category, index=out.index)
+    categorical = isinstance(df["category"].dtype, pd.CategoricalDtype)
+    out["category"] = category.astype("category" if categorical else df["category"].dtype)
+    if "cat_clean" in out.columns:
+        out["cat_clean"] = out["category"].astype(str).str.lower()
+    return out, len(rows)
@@ -0,0 +1,40 @@
+"""Vectorized income/expense classification."""
+import re
+
+import pandas as pd
+
+INCOME_KEYWORDS = [
+    "salary", "income", "refund", "profit", "credit",
+    "interest", "cashback", "deposit", "received"
+]
+
+
+def build_keyword_pattern(keywords):
+    """Compile keywords into one alternation regex (longest first), or None if empty."""
+    words = sorted({k.lower() for k in keywords if k}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w) for w in words))
+
+
+def match_keywords(text, pattern):
+    """Boolean mask of rows in a lowercased string Series containing any keyword."""
+    if pattern is None:
+        return pd.Series(False, index=text.index)
+    # pass the pattern source so Arrow-backed strings stay on the native regex path
+    return text.str.contains(pattern.pattern, regex=True, na=False)
+
+
+def classify_transactions(df, income_keywords=INCOME_KEYWORDS):
+    """Add is_income / actual_amount (income positive, expense negative)."""
+    pattern = build_keyword_pattern(income_keywords)
+
+    df = df.copy()
+    df['desc_clean'] = df['description'].astype(str).str.lower()
+    df['cat_clean'] = df['category'].astype(str).str.lower()
+
+    df['is_income'] = match_keywords(df['desc_clean'], pattern) | match_keywords(df['cat_clean'], pattern)
+
+    amt = df['amount'].abs()
+    df['actual_amount'] = amt.where(df['is_income'], -amt).fillna(0.0)
+    return df
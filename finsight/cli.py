@@ -0,0 +1,60 @@
+"""Command-line entry point for batch runs (``python -m finsight``)."""
+import argparse
+import os
+import sys
+import time
+
+from finsight.pipeline import (
+    DEFAULT_CLUSTERS, DEFAULT_CONTAMINATION, TIMINGS_FILE, collect_statements, run_batch,
+)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="finsight",
+        description="Run the FinSight Pro analytics pipeline on statement files without the dashboard.",
+    )
+    parser.add_argument("inputs", nargs="+", help="statement files (CSV/XLSX/XLS/PDF) or directories of them")
+    parser.add_argument("-o", "--out", default="finsight-output", help="output directory (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="parallel worker processes (default: one per CPU)")
+    parser.add_argument("--year", type=int, default=None, help="restrict the reports to one year")
+    parser.add_argument("--contamination", type=float, default=DEFAULT_CONTAMINATION,
+                        help="expected share of anomalies (default: %(default)s)")
+    parser.add_argument("--clusters", type=int, default=DEFAULT_CLUSTERS,
+                        help="clusters for transactions and months (default: %(default)s)")
+    parser.add_argument("--no-ml", action="store_true", help="skip anomaly detection and clustering")
+    parser.add_argument("--predict-categories", action="store_true",
+                        help="replace missing categories with ones learned from the categorized transactions")
+    parser.add_argument("--categorizer", default="",
+                        help="with --predict-categories: saved categorizer model (the dashboard's "
+                             "FINSIGHT_CATEGORIZER_MODEL) for statements with too few categorized rows to learn from")
+    parser.add_argument("--full-schema", action="store_true",
+                        help="keep the classifier helper columns in transaction exports")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = collect_statements(args.inputs)
+    if not paths:
+        print("No statement files found.", file=sys.stderr)
+        return 2
+
+    def report(record):
+        status = "ok" if record["status"] == "ok" else "FAILED"
+        line = f"{status:<6} {record['total_s']:>8.2f}s {record['rows']:>9} rows  {record['file']}"
+        if status != "ok":
+            line += f"  ({record['status']})"
+        print(line, flush=True)
+
+    start = time.perf_counter()
+    records = run_batch(
+        paths, args.out, workers=args.workers, progress=report,
+        year=args.year, contamination=args.contamination, n_clusters=args.clusters,
+        ml=not args.no_ml, compact=not args.full_schema,
+        predict_categories=args.predict_categories, categorizer=args.categorizer,
+    )
+    failed = sum(r["status"] != "ok" for r in records)
+    print(f"{len(records) - failed}/{len(records)} statements processed in {time.perf_counter() - start:.2f}s; "
+          f"timings in {os.path.join(args.out, TIMINGS_FILE)}")
+    return 1 if failed else 0
@@ -0,0 +1,108 @@
+"""Transaction clustering with a cached feature matrix and per-k model cache.
+
+The scaled feature matrix is built once per dataset view. Small views use
+KMeans(n_init=10) as before; above MINIBATCH_MIN_ROWS the engine switches to
+MiniBatchKMeans. Labels for every k are cached, and the remaining k values can
+be fitted ahead of time on a background thread so slider changes are instant.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from finsight.aggregates import net_by
+from finsight.jobs import failed
+
+CLUSTER_TOP_CATEGORIES = 6
+CLUSTER_K_RANGE = range(2, 7)
+MINIBATCH_MIN_ROWS = 50_000
+MINIBATCH_BATCH_SIZE = 4096
+
+# shared by all sessions; KMeans releases the GIL for most of its work
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="finsight-cluster")
+
+
+def transaction_features(df, top_n=CLUSTER_TOP_CATEGORIES):
+    """Copy of df with amt_feat/day/month_num, plus the feature matrix (numeric + top-category dummies)."""
+    tx = df.reset_index(drop=True)
+    tx["day"] = tx["date"].dt.day
+    tx["month_num"] = tx["date"].dt.month
+    tx["amt_feat"] = tx["actual_amount"].abs()
+
+    cats = tx["category"].astype(str)
+    top_cats = cats.value_counts().nlargest(top_n).index.tolist()
+    tx["category_trim"] = cats.where(cats.isin(top_cats), other="__other__")
+    dummies = pd.get_dummies(tx["category_trim"], prefix="cat")
+    return tx, pd.concat([tx[["amt_feat", "day", "month_num"]], dummies], axis=1)
+
+
+def cluster_months(cube, n_clusters, random_state=42):
+    """Monthly net totals with a KMeans cluster per month (on |net| and calendar month).
+
+    Returns None when there are fewer months than clusters.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    month_tot = net_by(cube, "month").reset_index()
+    if len(month_tot) < n_clusters:
+        return None
+    month_tot["month_num"] = month_tot["month"].dt.month
+    month_tot["amt_abs"] = month_tot["actual_amount"].abs()
+    X = StandardScaler().fit_transform(month_tot[["amt_abs", "month_num"]])
+    month_tot["cluster"] = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10).fit_predict(X)
+    return month_tot
+
+
+class TransactionClusterer:
+    """Scaled features for one dataset view and cached cluster labels per k."""
+
+    def __init__(self, df, top_n=CLUSTER_TOP_CATEGORIES, minibatch_min_rows=MINIBATCH_MIN_ROWS, random_state=42):
+        from sklearn.preprocessing import StandardScaler  # imported when clustering is first used
+
+        self.frame, feats = transaction_features(df, top_n)
+        self.X = StandardScaler().fit_transform(feats) if len(feats) else None
+        self.minibatch = len(self.frame) >= minibatch_min_rows
+        self.random_state = random_state
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _fit(self, k):
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+
+        if self.minibatch:
+            model = MiniBatchKMeans(n_clusters=k, random_state=self.random_state,
+                                    batch_size=MINIBATCH_BATCH_SIZE, n_init=3)
+        else:
+            model = KMeans(n_clusters=k, random_state=self.random_state, n_init=10)
+        return model.fit_predict(self.X)
+
+    def submit(self, k):
+        """Future for the labels of k, fitted once on the background pool."""
+        with self._lock:
+            if k not in self._futures or self._futures[k].cancelled() or failed(self._futures[k]):
+                self._futures[k] = _EXECUTOR.submit(self._fit, k)
+            return self._futures[k]
+
+    def labels(self, k):
+        """Cluster labels for k (fitted now, or taken from the cache / background job)."""
+        return self.submit(k).result()
+
+    def precompute(self, ks=CLUSTER_K_RANGE):
+        """Queue background fits for every k not fitted yet."""
+        for k in ks:
+            if k <= len(self.frame):
+                self.submit(k)
+
+    def cancel(self):
+        """Cancel queued fits (e.g. when this view is no longer shown)."""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+
+    def ready(self, k):
+        future = self._futures.get(k)
+        return future is not None and future.done()
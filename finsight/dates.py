@@ -0,0 +1,156 @@
+"""Date-format inference and explicit-format parsing for statement date columns.
+
+``pd.to_datetime`` without a format guesses one from the first value, so a
+day-first column whose first date is ambiguous (01/02/2024) is read month-first
+and its later dates come out wrong or NaT. Instead, a sample of the column's
+distinct values is tried against known bank formats and the format parsing the
+most of them wins; ties go to the earlier entry of DATE_FORMATS, so ambiguous
+columns are read month-first, as pandas does. The column is then parsed with
+that explicit format in one vectorized call; only values it can't read are
+retried with other formats.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+DATE_FORMATS = [
+    "ISO8601",  # 2024-03-01, 2024-03-01 10:15:00, 2024-03-01T10:15:00.123+05:30, ...
+    "%Y/%m/%d", "%Y%m%d",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M",
+    "%m-%d-%Y", "%d-%m-%Y", "%m-%d-%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S",
+    "%d.%m.%Y", "%m/%d/%y", "%d/%m/%y", "%d-%m-%y",
+    "%d-%b-%Y", "%d %b %Y", "%d-%b-%y", "%d %b %y", "%b %d, %Y", "%d %B %Y", "%B %d, %Y",
+]
+# unix timestamps, told apart by digit count: seconds / milliseconds
+EPOCH_FORMATS = {10: "epoch_s", 13: "epoch_ms"}
+SAMPLE_SIZE = 500
+INFER_SAMPLE_SIZE = 5000  # rows the format is inferred from (their distinct values are sampled)
+DATE_DTYPE = "datetime64[us]"
+# a time of day followed by a UTC offset; the offset is dropped before parsing, since values
+# with different offsets can't be parsed into one column (and only wall-clock time is kept)
+UTC_OFFSET = r"(\d:\d{2}(?::\d{2}(?:\.\d+)?)?)\s*(?:Z|[+-]\d{2}:?\d{2})$"
+_UTC_OFFSET_RE = re.compile(UTC_OFFSET)
+
+
+def _with_format(values, date_format):
+    """Parse strings (Index or Series) with one format; unparseable values become NaT."""
+    if date_format.startswith("epoch_"):
+        numbers = pd.to_numeric(values, errors="coerce")
+        return pd.DatetimeIndex(pd.to_datetime(numbers, unit=date_format[len("epoch_"):], errors="coerce")).as_unit("us")
+    if date_format == "ISO8601" and _has_offsets(_spread(values, SAMPLE_SIZE)):
+        values = _strip_offset(values)
+    try:
+        parsed = pd.DatetimeIndex(pd.to_datetime(values, format=date_format, errors="coerce"))
+    except ValueError:
+        # "Mixed timezones detected" from offsets the sample didn't show
+        parsed = pd.DatetimeIndex(pd.to_datetime(_strip_offset(values), format=date_format, errors="coerce"))
+    if parsed.tz is not None:
+        parsed = parsed.tz_localize(None)  # keep the statement's wall-clock time
+    return parsed.as_unit("us")
+
+
+def _has_offsets(values):
+    return any(isinstance(v, str) and _UTC_OFFSET_RE.search(v) for v in values)
+
+
+def _strip_offset(values):
+    """values without a trailing UTC offset, keeping the statement's wall-clock time."""
+    return values.str.replace(UTC_OFFSET, r"\1", regex=True)
+
+
+def _candidates(sample):
+    formats = list(DATE_FORMATS)
+    lengths = np.asarray(sample.str.len())  # positional: sample may be a slice of a Series
+    if sample.str.isdigit().all() and len(set(lengths)) == 1 and lengths[0] in EPOCH_FORMATS:
+        formats.insert(0, EPOCH_FORMATS[lengths[0]])
+    return formats
+
+
+def infer_date_format(values, sample_size=SAMPLE_SIZE):
+    """The DATE_FORMATS entry (or epoch unit) parsing most of a sample of values' distinct strings.
+
+    Returns None if no format parses any of them.
+    """
+    uniques = pd.Index(pd.unique(pd.Series(values).dropna().astype(str).str.strip()))
+    uniques = uniques[uniques != ""]
+    if uniques.empty:
+        return None
+    sample = _spread(uniques, sample_size)  # over the whole column rather than its head
+    best, best_hits = None, 0
+    for date_format in _candidates(sample):
+        hits = int(_with_format(sample, date_format).notna().sum())
+        if hits > best_hits:
+            best, best_hits = date_format, hits
+            if hits == len(sample):
+                break
+    return best
+
+
+class DateParser:
+    """Parses one file's date column, chunk by chunk.
+
+    The format is inferred from the first chunk (unless given) and reused; each
+    chunk is parsed with one ``pd.to_datetime`` call in that format (which
+    parses repeated strings once). Only the values it can't read are tried with
+    the other known formats, then with pandas' per-value parser, so mixed
+    columns still parse.
+    """
+
+    def __init__(self, date_format=None):
+        self.date_format = date_format
+
+    def __call__(self, values):
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values) or not _holds_strings(values):
+            # already dates (PDF extraction, typed Excel cells)
+            return pd.to_datetime(values, errors="coerce")
+        strings = values.str.strip() if _needs_strip(values) else values
+        if self.date_format is None:
+            self.date_format = infer_date_format(_spread(strings, INFER_SAMPLE_SIZE))
+        return pd.Series(self._parse(strings), index=values.index)
+
+    def _parse(self, strings):
+        """datetime64 array for a Series of stripped date strings."""
+        if self.date_format is not None:
+            dates = np.array(_with_format(strings, self.date_format))
+        else:
+            dates = np.full(len(strings), np.datetime64("NaT"), dtype=DATE_DTYPE)
+        todo = np.isnat(dates)
+        if todo.any():
+            todo &= strings.notna().to_numpy() & (strings != "").to_numpy()
+        if todo.any():
+            # mixed columns: the other known formats, then pandas' per-value parser
+            for date_format in [f for f in _candidates(strings[todo]) if f != self.date_format]:
+                attempt = _with_format(strings[todo], date_format).to_numpy()
+                hit = ~np.isnat(attempt)
+                rows = np.flatnonzero(todo)[hit]
+                dates[rows] = attempt[hit]
+                todo[rows] = False
+                if not todo.any():
+                    break
+        if todo.any():
+            rest = pd.DatetimeIndex(pd.to_datetime(_strip_offset(strings[todo]), format="mixed", errors="coerce"))
+            dates[todo] = (rest.tz_localize(None) if rest.tz is not None else rest).as_unit("us").to_numpy()
+        return dates
+
+
+def _spread(values, n):
+    """Up to n entries spread evenly over an Index or Series."""
+    positions = np.linspace(0, len(values) - 1, min(n, len(values))).astype(int)
+    return values.iloc[positions] if isinstance(values, pd.Series) else values[positions]
+
+
+def _needs_strip(strings):
+    sample = _spread(strings, SAMPLE_SIZE).dropna()
+    return bool((sample.str.len() != sample.str.strip().str.len()).any()) or len(strings) <= SAMPLE_SIZE
+
+
+def _holds_strings(values):
+    first = values.first_valid_index()
+    return first is not None and isinstance(values[first], str)
+
+
+def parse_dates(values, date_format=None):
+    """Datetime Series for a column of date strings (format inferred if not given)."""
+    return DateParser(date_format)(values)
@@ -0,0 +1,88 @@
+"""Server-side downsampling for large Plotly charts.
+
+Line charts use Largest-Triangle-Three-Buckets (LTTB), which keeps the visual
+shape of a series with a fixed number of points; rows flagged as "keep" (e.g.
+anomalies) are always retained. Scatter plots keep, per group and per x bucket,
+the rows with the smallest and largest y, so each group's envelope and extremes
+survive. Above WEBGL_MIN_POINTS charts should render with WebGL (scattergl).
+"""
+import numpy as np
+import pandas as pd
+
+CHART_MAX_POINTS = 4000
+CHART_POINT_BUDGETS = [1000, 2000, 4000, 8000, 16000, 32000]
+WEBGL_MIN_POINTS = 5000
+
+
+def render_mode(n_points):
+    """Plotly Express render_mode for a trace of n_points."""
+    return "webgl" if n_points > WEBGL_MIN_POINTS else "auto"
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the n_out points LTTB keeps from (x, y), sorted by x beforehand."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    every = (n - 2) / (n_out - 2)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_stop = stop, min(int((i + 2) * every) + 1, n)
+        if next_start >= next_stop:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        # area of the triangle (previous kept point, candidate, next bucket average)
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_line(df, x, y, max_points=CHART_MAX_POINTS, keep=None):
+    """Rows of df (sorted by x) reduced to about max_points with LTTB, plus every row where keep is True."""
+    df = df.sort_values(x)
+    if len(df) <= max_points:
+        return df
+    mask = np.zeros(len(df), dtype=bool)
+    mask[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), max_points)] = True
+    if keep is not None:
+        mask |= np.asarray(keep.reindex(df.index), dtype=bool)
+    return df[mask]
+
+
+def downsample_groups(df, x, y, group, max_points=CHART_MAX_POINTS):
+    """Per-group min/max-y rows over x buckets, about max_points rows in total.
+
+    Each group gets a share of the budget proportional to its size (at least
+    two buckets), so small clusters keep all or most of their points.
+    """
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values([group, x])
+    sizes = df.groupby(group, observed=True, sort=False)[x].transform("size").to_numpy()
+    budget = np.maximum(2, (max_points * sizes / len(df)) // 2).astype(np.int64)  # buckets per group
+    rank = df.groupby(group, observed=True, sort=False).cumcount().to_numpy()
+    bucket = rank * budget // sizes
+    keys = [df[group].to_numpy(), bucket]
+    y_values = df[y].reset_index(drop=True)
+    grouped = y_values.groupby(keys, sort=False)
+    rows = np.union1d(grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy())
+    return df.iloc[rows]
+
+
+def window(df, x, start, end):
+    """Rows with start <= x < end + 1 day (an inclusive date window)."""
+    lo, hi = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+    return df[(df[x] >= lo) & (df[x] < hi)]
@@ -0,0 +1,101 @@
+"""Download payloads: chunked CSV and constant-memory XLSX writers, plus a shared cache.
+
+Writers work through the frame in row chunks, so only one chunk of formatted
+text / cell values exists at a time next to the output buffer. ExportCache
+keeps finished payloads keyed by dataset hash and view parameters, so a payload
+is built once and reused by every rerun (and session) that asks for it.
+"""
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+    XLSX_AVAILABLE = True
+except Exception:
+    XLSX_AVAILABLE = False
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+XLSX_MAX_ROWS = 1_048_575  # Excel's sheet limit, less the header row
+
+
+def csv_bytes(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """df as CSV bytes, encoded chunk by chunk so the full text never exists as one str."""
+    out = BytesIO()
+    for start in range(0, max(len(df), 1), chunk_rows):
+        out.write(df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode())
+    return out.getvalue()
+
+
+def _cell_values(col):
+    # python objects xlsxwriter can write directly; missing values become None (blank cells)
+    missing = col.isna().to_numpy()
+    if isinstance(col.dtype, (pd.PeriodDtype, pd.CategoricalDtype)):
+        col = col.astype(str)
+    if pd.api.types.is_datetime64_any_dtype(col) and col.dt.tz is not None:
+        col = col.dt.tz_localize(None)  # Excel has no time zones
+    # datetimes become Timestamps (datetime subclasses), without to_pydatetime()'s FutureWarning
+    values = np.array(col.astype(object), dtype=object)
+    values[missing] = None
+    return values
+
+
+def xlsx_bytes(sheets, chunk_rows=EXPORT_CHUNK_ROWS):
+    """{sheet name: DataFrame} as XLSX bytes, written row by row in xlsxwriter's constant-memory mode.
+
+    Returns None if xlsxwriter is missing or a sheet exceeds Excel's row limit.
+    """
+    if not XLSX_AVAILABLE or any(len(df) > XLSX_MAX_ROWS for df in sheets.values()):
+        return None
+    out = BytesIO()
+    workbook = xlsxwriter.Workbook(out, {"constant_memory": True})
+    header_fmt = workbook.add_format({"bold": True, "border": 1})
+    date_fmt = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+    for name, df in sheets.items():
+        ws = workbook.add_worksheet(name[:31])
+        for i, col in enumerate(df.columns):
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                ws.set_column(i, i, 19, date_fmt)
+        ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+        row = 1
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            for values in zip(*(_cell_values(chunk[c]) for c in chunk.columns)):
+                ws.write_row(row, 0, values)
+                row += 1
+    workbook.close()
+    return out.getvalue()
+
+
+class ExportCache:
+    """Thread-safe LRU of finished export payloads, bounded by their total size."""
+
+    def __init__(self, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if data is None:
+            return None
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > 1 and sum(len(d) for d in self._items.values()) > self.max_bytes:
+                self._items.popitem(last=False)
+        return data
+
+    def get_or_build(self, key, build):
+        data = self.get(key)
+        return data if data is not None else self.put(key, build())
@@ -0,0 +1,121 @@
+"""Batched cash-flow forecasts: income and expense per category for the coming months.
+
+Every (kind, category) monthly series of the aggregate cube becomes one row
+of a matrix over consecutive calendar months (empty months are zero). Three
+light models are fitted to all rows at once with array operations: seasonal
+naive (the same month a year earlier), damped-trend exponential smoothing
+(Holt) and a least-squares linear trend. Each series uses the model with the
+lowest error on its last few months held out, refitted on the full history.
+"""
+import numpy as np
+import pandas as pd
+
+FORECAST_HORIZONS = list(range(3, 13))
+DEFAULT_HORIZON = 6
+SEASON = 12
+HOLT_ALPHA = 0.5  # level smoothing
+HOLT_BETA = 0.1  # trend smoothing
+HOLT_PHI = 0.9  # trend damping per month ahead
+BACKTEST_MONTHS = 3
+MIN_BACKTEST_HISTORY = 8  # months needed before models are compared on a holdout
+MODELS = ["seasonal_naive", "holt", "linear_trend"]
+FORECAST_COLUMNS = ["month", "kind", "category", "forecast", "model"]
+
+
+def category_series(cube):
+    """(kind, category) x month matrix of income/expense totals (positive) over consecutive months."""
+    cells = cube[cube["sign"] != 0]
+    if cells.empty:
+        return pd.DataFrame()
+    category_codes, categories = pd.factorize(cells["category"].astype(str), sort=True)
+    # series id: kind ("expense" before "income") then category, as sorted (kind, category) pairs
+    codes = (cells["sign"].to_numpy() > 0) * len(categories) + category_codes
+    present = np.flatnonzero(np.bincount(codes, minlength=2 * len(categories)))
+    codes = np.searchsorted(present, codes)
+    series = pd.MultiIndex.from_arrays(
+        [np.where(present >= len(categories), "income", "expense"), np.asarray(categories)[present % len(categories)]],
+        names=["kind", "category"],
+    )
+    months = pd.PeriodIndex(cells["month"], freq="M")
+    calendar = pd.period_range(months.min(), months.max(), freq="M", name="month")
+    ordinals, start, n_months = months.asi8, months.min().ordinal, len(calendar)
+    # one bincount scatters every cell into its (series, month) slot
+    flat = np.bincount(codes * n_months + (ordinals - start), weights=cells["total"].abs().to_numpy(),
+                       minlength=len(series) * n_months)
+    return pd.DataFrame(flat.reshape(len(series), n_months), index=series, columns=calendar)
+
+
+def seasonal_naive(Y, horizon):
+    """Each series' value a season earlier (its last value while history is shorter than a season)."""
+    T = Y.shape[1]
+    if T < SEASON:
+        return np.repeat(Y[:, -1:], horizon, axis=1)
+    return Y[:, T - SEASON + np.arange(horizon) % SEASON]
+
+
+def holt(Y, horizon, alpha=HOLT_ALPHA, beta=HOLT_BETA, phi=HOLT_PHI):
+    """Damped-trend exponential smoothing, one time step at a time over all series."""
+    level = Y[:, 0].astype(float)
+    trend = Y[:, 1] - Y[:, 0] if Y.shape[1] > 1 else np.zeros(len(Y))
+    for t in range(1, Y.shape[1]):
+        previous = level
+        level = alpha * Y[:, t] + (1 - alpha) * (previous + phi * trend)
+        trend = beta * (level - previous) + (1 - beta) * phi * trend
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return level[:, None] + trend[:, None] * damping[None, :]
+
+
+def linear_trend(Y, horizon):
+    """Least-squares line through each series, extended horizon months."""
+    T = Y.shape[1]
+    x = np.arange(T, dtype=float)
+    x_mean, y_mean = x.mean(), Y.mean(axis=1)
+    denom = ((x - x_mean) ** 2).sum()
+    slope = (Y - y_mean[:, None]) @ (x - x_mean) / denom if denom else np.zeros(len(Y))
+    ahead = np.arange(T, T + horizon, dtype=float) - x_mean
+    return y_mean[:, None] + slope[:, None] * ahead[None, :]
+
+
+def _fit(Y, horizon):
+    """(models x series x horizon) forecasts of every model."""
+    return np.stack([seasonal_naive(Y, horizon), holt(Y, horizon), linear_trend(Y, horizon)])
+
+
+def select_models(Y):
+    """Index into MODELS of the model with the lowest holdout error, per series."""
+    T = Y.shape[1]
+    if T < MIN_BACKTEST_HISTORY:
+        return np.full(len(Y), MODELS.index("holt"))
+    holdout = min(BACKTEST_MONTHS, T // 4)
+    errors = np.abs(_fit(Y[:, :T - holdout], holdout) - Y[None, :, T - holdout:]).mean(axis=2)
+    return errors.argmin(axis=0)
+
+
+def forecast_categories(cube, horizon=DEFAULT_HORIZON):
+    """Income/expense forecast per category for the horizon months after the cube's last month."""
+    table = category_series(cube)
+    if table.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    Y = table.to_numpy(dtype=float)
+    chosen = select_models(Y)
+    forecasts = np.take_along_axis(_fit(Y, horizon), chosen[None, :, None], axis=0)[0]
+    forecasts = np.clip(forecasts, 0, None)  # amounts are magnitudes
+
+    future = pd.period_range(table.columns[-1] + 1, periods=horizon, freq="M")
+    n_series = len(table)
+    return pd.DataFrame({
+        "month": future[np.tile(np.arange(horizon), n_series)],
+        "kind": np.repeat(table.index.get_level_values("kind"), horizon),
+        "category": np.repeat(table.index.get_level_values("category"), horizon),
+        "forecast": forecasts.ravel().round(2),
+        "model": np.repeat(np.asarray(MODELS, dtype=object)[chosen], horizon),
+    })
+
+
+def forecast_cashflow(category_forecast):
+    """Per-month forecast income, expense and savings from forecast_categories()."""
+    totals = category_forecast.pivot_table(index="month", columns="kind", values="forecast", aggfunc="sum", fill_value=0)
+    flow = totals.reindex(columns=["income", "expense"], fill_value=0)
+    flow["savings"] = flow["income"] - flow["expense"]
+    flow.columns.name = None
+    return flow
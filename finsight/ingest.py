@@ -0,0 +1,204 @@
+"""Statement ingestion: column detection, normalization and chunked reading.
+
+CSV/XLSX exports are read in fixed-size row chunks (header parsed once, only the
+detected columns loaded, all as strings) and each chunk is normalized and
+classified before being appended to a ChunkStore, so peak memory is bounded by
+the chunk size rather than the file size.
+"""
+import os
+
+import pandas as pd
+
+from finsight.classify import INCOME_KEYWORDS, classify_transactions
+from finsight.dates import DateParser
+from finsight.pdf_extract import extract_transactions_from_pdf
+from finsight.profiling import NULL_PROFILER
+from finsight.schema import compact_frame, concat_columns
+
+DATE_COLS = ["date", "transaction_date", "timestamp", "time"]
+AMT_COLS = ["amount", "amt", "value", "txn_amount", "debit", "credit"]
+DESC_COLS = ["description", "details", "remark", "narration", "desc"]
+CAT_COLS = ["category", "type", "label", "tag"]
+
+CHUNK_ROWS = 200_000
+
+MISSING_COLUMNS_MSG = (
+    "Couldn't detect required columns (date/amount). "
+    "Use a CSV/XLSX with 'date' and 'amount' or upload a statement PDF."
+)
+
+
+def _file_name(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    return file.name
+
+
+def detect_columns(columns):
+    """Map raw header names to date/amount/description/category source columns.
+
+    Header names are matched case-insensitively after stripping; the first
+    matching header wins. Raises ValueError if date or amount is missing.
+    """
+    normalized = [(str(c).lower().strip(), c) for c in columns]
+
+    def find_col(possible):
+        for norm, raw in normalized:
+            if norm in possible:
+                return raw
+        return None
+
+    cols = {
+        "date": find_col(DATE_COLS),
+        "amount": find_col(AMT_COLS),
+        "description": find_col(DESC_COLS),
+        "category": find_col(CAT_COLS),
+    }
+    if cols["date"] is None or cols["amount"] is None:
+        raise ValueError(MISSING_COLUMNS_MSG)
+    return cols
+
+
+def normalize_frame(df, cols, date_parser=None):
+    """Build the canonical date/amount/description/category/month/year frame.
+
+    Pass the same DateParser for every chunk of a file so its date format is
+    inferred once and repeated date strings are parsed once.
+    """
+    out = pd.DataFrame(index=df.index)
+    out["date"] = (date_parser or DateParser())(df[cols["date"]])
+    out["amount"] = pd.to_numeric(df[cols["amount"]].astype(str).str.replace(",", ""), errors="coerce")
+    out["description"] = df[cols["description"]].astype(str) if cols["description"] is not None else "N/A"
+    out["category"] = df[cols["category"]].astype(str) if cols["category"] is not None else "Uncategorized"
+    out = out.dropna(subset=["date", "amount"])
+    out["month"] = out["date"].dt.to_period("M")
+    out["year"] = out["date"].dt.year
+    return out
+
+
+def _used_columns(cols):
+    return list(dict.fromkeys(c for c in cols.values() if c is not None))
+
+
+def iter_csv_chunks(file, chunksize=CHUNK_ROWS):
+    header = pd.read_csv(file, nrows=0).columns
+    cols = detect_columns(header)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    usecols = _used_columns(cols)
+    reader = pd.read_csv(file, usecols=usecols, dtype={c: str for c in usecols}, chunksize=chunksize)
+    date_parser = DateParser()
+    with reader:
+        for chunk in reader:
+            yield normalize_frame(chunk, cols, date_parser)
+
+
+def iter_xlsx_chunks(file, chunksize=CHUNK_ROWS):
+    # openpyxl's read-only mode streams rows instead of loading the whole sheet
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)  # first sheet, like pd.read_excel
+        header = [("" if v is None else str(v)) for v in next(rows, ())]
+        cols = detect_columns(header)
+        usecols = _used_columns(cols)
+        positions = [header.index(c) for c in usecols]
+
+        buf = []
+        date_parser = DateParser()
+        for row in rows:
+            buf.append([row[i] if i < len(row) else None for i in positions])
+            if len(buf) >= chunksize:
+                yield normalize_frame(pd.DataFrame(buf, columns=usecols), cols, date_parser)
+                buf = []
+        if buf:
+            yield normalize_frame(pd.DataFrame(buf, columns=usecols), cols, date_parser)
+    finally:
+        wb.close()
+
+
+def iter_normalized_chunks(file, chunksize=CHUNK_ROWS, pdf_progress=None, pdf_workers=None):
+    """Yield normalized transaction chunks for a CSV, XLSX/XLS or statement PDF.
+
+    ``pdf_workers`` caps the PDF extractor's worker processes (None: one per CPU).
+    """
+    fname = _file_name(file).lower()
+    if fname.endswith(".csv"):
+        yield from iter_csv_chunks(file, chunksize)
+    elif fname.endswith(".xlsx"):
+        yield from iter_xlsx_chunks(file, chunksize)
+    elif fname.endswith(".xls"):
+        # legacy .xls has no streaming reader; it is read in one go
+        df = pd.read_excel(file)
+        yield normalize_frame(df, detect_columns(df.columns))
+    elif fname.endswith(".pdf"):
+        try:
+            df = extract_transactions_from_pdf(file, progress=pdf_progress, max_workers=pdf_workers)
+        except Exception as e:
+            raise ValueError("PDF parsing error: " + str(e)) from e
+        yield normalize_frame(df, detect_columns(df.columns))
+    else:
+        raise ValueError("Unsupported file type.")
+
+
+class ChunkStore:
+    """Append-only columnar store for normalized chunks.
+
+    Columns are kept as lists of per-chunk Series and joined one column at a time
+    in to_frame(), so the final frame never coexists with a full copy of itself.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self.rows = 0
+
+    def append(self, chunk):
+        for name in chunk.columns:
+            # copy so the stored column doesn't pin the chunk's whole 2D block in memory
+            self._columns.setdefault(name, []).append(chunk[name].reset_index(drop=True).copy())
+        self.rows += len(chunk)
+
+    def to_frame(self):
+        data = {}
+        for name in list(self._columns):
+            parts = self._columns.pop(name)
+            data[name] = concat_columns(parts)
+            del parts
+        self.rows = 0
+        # the joined columns are already fresh copies; don't copy them again into blocks
+        return pd.DataFrame(data, copy=False)
+
+
+def process_uploaded_file(file, chunksize=CHUNK_ROWS, pdf_progress=None, pdf_workers=None):
+    """Read and normalize a statement file (no classification)."""
+    store = ChunkStore()
+    for chunk in iter_normalized_chunks(file, chunksize, pdf_progress, pdf_workers):
+        store.append(chunk)
+    return store.to_frame()
+
+
+def load_ledger(file, income_keywords=INCOME_KEYWORDS, chunksize=CHUNK_ROWS, pdf_progress=None, compact=False,
+                pdf_workers=None, profiler=None):
+    """Read, normalize and classify a statement file chunk by chunk.
+
+    With ``compact=True`` each chunk is converted to the compact schema
+    (see finsight.schema) before it is stored. A StageProfiler, if given,
+    records the parse, classify, compact and assemble stages.
+    """
+    profiler = profiler or NULL_PROFILER
+    store = ChunkStore()
+    chunks = iter_normalized_chunks(file, chunksize, pdf_progress, pdf_workers)
+    while True:
+        with profiler.stage("parse"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with profiler.stage("classify"):
+            chunk = classify_transactions(chunk, income_keywords)
+        if compact:
+            with profiler.stage("compact"):
+                chunk = compact_frame(chunk)
+        store.append(chunk)
+    with profiler.stage("assemble"):
+        return store.to_frame()
@@ -0,0 +1,60 @@
+"""Background jobs for the slow dashboard computations (model fits), one board per session.
+
+Jobs run on a shared thread pool and are deduplicated by key: asking again for
+a key that is queued, running or finished returns the same future; a job that
+raised is started again. Every job
+belongs to the board's current scope (dataset + year filter); moving to another
+scope cancels the old scope's jobs that have not started yet and forgets the
+rest, so a running fit for a stale view finishes unobserved.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# shared by all sessions; IsolationForest/KMeans release the GIL for most of their work
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="finsight-job")
+
+
+class JobBoard:
+    def __init__(self, executor=None):
+        self.executor = executor or _EXECUTOR
+        self.scope = None
+        self.stats = {"submitted": 0, "deduplicated": 0, "cancelled": 0, "dropped": 0, "retried": 0}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def set_scope(self, scope):
+        """Switch to scope, cancelling the previous scope's jobs. Returns True if it changed."""
+        with self._lock:
+            if scope == self.scope:
+                return False
+            for future in self._jobs.values():
+                if future.cancel():
+                    self.stats["cancelled"] += 1
+                elif not future.done():
+                    self.stats["dropped"] += 1
+            self._jobs.clear()
+            self.scope = scope
+            return True
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Future for fn(*args, **kwargs), started once per key within the current scope."""
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None and not future.cancelled() and not failed(future):
+                self.stats["deduplicated"] += 1
+                return future
+            if future is not None and failed(future):
+                self.stats["retried"] += 1
+            future = self.executor.submit(fn, *args, **kwargs)
+            self._jobs[key] = future
+            self.stats["submitted"] += 1
+            return future
+
+    def pending(self):
+        with self._lock:
+            return [key for key, future in self._jobs.items() if not future.done()]
+
+
+def failed(future):
+    """Whether future finished by raising (cancelled futures don't count)."""
+    return future.done() and not future.cancelled() and future.exception() is not None
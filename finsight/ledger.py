@@ -0,0 +1,82 @@
+"""Running ledger merged from several statements, with overlap detection.
+
+Each transaction gets a uint64 key from (day, amount in paise, normalized
+description), so the same transaction keys alike from any source. The ledger
+keeps a count of every key it holds, so a statement that overlaps earlier ones
+(e.g. re-uploading a month) contributes only the transactions beyond those
+already merged. Repeats inside one statement (two identical
+coffees on the same day) are kept: the n-th occurrence of a key is new only if
+the ledger holds fewer than n of it. Only the new rows are aggregated; their
+cube is merged into the running one.
+"""
+import numpy as np
+import pandas as pd
+
+from finsight.aggregates import build_cube, merge_cubes
+from finsight.ingest import ChunkStore
+
+
+def normalize_descriptions(values):
+    """Lower-cased descriptions with runs of whitespace collapsed."""
+    return values.astype(str).str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def transaction_keys(df):
+    """uint64 key per transaction from (day, amount in paise, normalized description)."""
+    desc = df["description"]
+    if isinstance(desc.dtype, pd.CategoricalDtype):
+        # normalize and hash each category once, then look the hashes up by code
+        cat_hashes = pd.util.hash_array(normalize_descriptions(desc.cat.categories.to_series()).to_numpy(dtype=object))
+        codes = desc.cat.codes.to_numpy()
+        desc_hashes = np.where(codes >= 0, cat_hashes[codes], 0)
+    else:
+        desc_hashes = pd.util.hash_array(normalize_descriptions(desc).to_numpy(dtype=object))
+    # day and whole paise, so the same transaction keys alike whichever source dtypes it was
+    # parsed with (PDF datetime64[s], CSV [us], XLSX [ns]; int64 or float64 amounts)
+    paise = np.round(df["amount"].to_numpy(dtype=np.float64, na_value=np.nan) * 100)
+    keys = pd.DataFrame({
+        "date": df["date"].to_numpy().astype("datetime64[D]"),
+        "amount": np.where(np.isnan(paise), np.iinfo(np.int64).min, paise).astype(np.int64),
+        "description": desc_hashes,
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class RunningLedger:
+    """Transactions of several statements appended in upload order, without duplicates."""
+
+    def __init__(self):
+        self.parts = []
+        self.stats = []
+        self.df = None
+        self.cube = None
+        self._counts = pd.Series(dtype=np.int64)  # occurrences held per transaction key
+
+    def __len__(self):
+        return 0 if self.df is None else len(self.df)
+
+    def add(self, df, part, cube=None):
+        """Merge statement df (already classified) as part; cube, if given, is df's own cube.
+
+        Returns {"part", "rows", "added", "duplicates"} for the statement.
+        """
+        keys = transaction_keys(df)
+        occurrence = pd.Series(keys).groupby(keys).cumcount().to_numpy()
+        held = self._counts.reindex(keys, fill_value=0).to_numpy()
+        new = occurrence >= held
+        added = df if new.all() else df[new]
+        self._counts = self._counts.add(pd.Series(keys[new]).value_counts(), fill_value=0).astype(np.int64)
+
+        if len(added):
+            part_cube = cube if cube is not None and added is df else build_cube(added)
+            self.cube = merge_cubes(self.cube, part_cube)
+            store = ChunkStore()
+            if self.df is not None:
+                store.append(self.df)
+            store.append(added)
+            self.df = store.to_frame()
+
+        self.parts.append(part)
+        stats = {"part": part, "rows": len(df), "added": len(added), "duplicates": len(df) - len(added)}
+        self.stats.append(stats)
+        return stats
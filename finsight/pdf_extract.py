@@ -0,0 +1,159 @@
+"""Page-streaming, parallel transaction extraction from statement PDFs."""
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+AMOUNT_RE = re.compile(r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})|\d+(?:\.\d{2}))")
+# (pattern, formats tried in order): month-first before day-first, matching the
+# previous pd.to_datetime(dayfirst=False) -> dayfirst=True fallback
+DATE_PATTERNS = [
+    (re.compile(r"(20\d{2}-\d{2}-\d{2})"), ("%Y-%m-%d", "%Y-%d-%m")),
+    (re.compile(r"(\d{2}/\d{2}/20\d{2})"), ("%m/%d/%Y", "%d/%m/%Y")),
+    (re.compile(r"(\d{2}-\d{2}-20\d{2})"), ("%m-%d-%Y", "%d-%m-%Y")),
+]
+
+PAGES_PER_TASK = 8
+PARALLEL_MIN_PAGES = 16  # below this the process pool start-up costs more than it saves
+
+COLUMNS = ["date", "description", "amount", "category"]
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=4096)
+def parse_statement_date(raw, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _make_chunk(dates, descs, amounts, cats):
+    return {
+        "date": np.array(dates, dtype="datetime64[D]"),
+        "description": np.array(descs, dtype=object),
+        "amount": np.array(amounts, dtype=np.float64),
+        "category": np.array(cats, dtype=object),
+    }
+
+
+def _concat_chunks(chunks):
+    if not chunks:
+        return _make_chunk([], [], [], [])
+    return {c: np.concatenate([ch[c] for ch in chunks]) for c in COLUMNS}
+
+
+def parse_page_text(text):
+    """Parse one page of statement text into a columnar chunk (dict of arrays)."""
+    dates, descs, amounts, cats = [], [], [], []
+    for line in text.split("\n"):
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        m = AMOUNT_RE.search(line.replace("■", ""))
+        if not m:
+            continue
+        for date_re, formats in DATE_PATTERNS:
+            date_match = date_re.search(line)
+            if date_match:
+                break
+        else:
+            continue
+        date = parse_statement_date(date_match.group(1), formats)
+        if date is None:
+            continue
+        dates.append(date)
+        amounts.append(float(m.group(1).replace(",", "")))
+        cats.append(parts[-1])
+        descs.append(" ".join(parts[1:-1]) if len(parts) > 2 else "")
+    return _make_chunk(dates, descs, amounts, cats)
+
+
+def _extract_page_range(path, start, stop):
+    import pdfplumber
+
+    chunks = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            text = page.extract_text()
+            page.close()  # drop pdfplumber's per-page object cache as we go
+            if text:
+                chunks.append(parse_page_text(text))
+    return start, stop, _concat_chunks(chunks)
+
+
+@contextmanager
+def _as_path(source):
+    # worker processes re-open the PDF themselves, so file-like uploads are spilled to disk once
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    data = source.getvalue() if hasattr(source, "getvalue") else source.read()
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def iter_pdf_chunks(source, max_workers=None, pages_per_task=PAGES_PER_TASK):
+    """Yield (start_page, stop_page, total_pages, chunk) as page batches finish.
+
+    Batches arrive in completion order; large PDFs are fanned out to a process pool.
+    """
+    # pdfplumber/pdfminer are only imported once a PDF is uploaded
+    import pdfplumber
+
+    with _as_path(source) as path:
+        with pdfplumber.open(path) as pdf:
+            n_pages = len(pdf.pages)
+        ranges = [(s, min(s + pages_per_task, n_pages)) for s in range(0, n_pages, pages_per_task)]
+        workers = min(max_workers or available_cpus(), len(ranges))
+
+        if n_pages < PARALLEL_MIN_PAGES or workers <= 1:
+            for start, stop in ranges:
+                yield _with_total(_extract_page_range(path, start, stop), n_pages)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(_extract_page_range, path, start, stop) for start, stop in ranges]
+            for fut in as_completed(futures):
+                yield _with_total(fut.result(), n_pages)
+
+
+def _with_total(result, n_pages):
+    start, stop, chunk = result
+    return start, stop, n_pages, chunk
+
+
+def extract_transactions_from_pdf(source, progress=None, max_workers=None):
+    """Extract date/description/amount/category rows from a statement PDF.
+
+    ``progress(pages_done, total_pages)`` is called as each page batch completes.
+    """
+    parts = []
+    done = 0
+    for start, stop, n_pages, chunk in iter_pdf_chunks(source, max_workers=max_workers):
+        parts.append((start, chunk))
+        done += stop - start
+        if progress is not None:
+            progress(done, n_pages)
+    parts.sort(key=lambda p: p[0])  # restore page order
+    return pd.DataFrame(_concat_chunks([chunk for _, chunk in parts]), columns=COLUMNS)
@@ -0,0 +1,188 @@
+"""Headless analytics pipeline: statement files in, the dashboard's exports out.
+
+run_statement() runs parse -> classify -> aggregate -> anomalies -> clusters for
+one statement and writes the same CSV/Excel files the dashboard's download
+buttons produce. run_batch() does this for many statements across worker
+processes and records per-file stage timings in timings.csv.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from finsight.aggregates import build_cube, net_by, slice_year
+from finsight.anomaly import MIN_ROWS as ANOMALY_MIN_ROWS, AnomalyModel, anomaly_table, label_anomalies
+from finsight.categorize import CategoryModel, categorize, train_categorizer, unlabelled_mask
+from finsight.clustering import TransactionClusterer, cluster_months
+from finsight.forecast import DEFAULT_HORIZON, forecast_categories
+from finsight.ingest import load_ledger
+from finsight.recurring import detect_recurring
+from finsight.pdf_extract import available_cpus
+from finsight.profiling import NULL_PROFILER, StageProfiler
+from finsight.reports import (
+    headline_metrics, insights_table, monthly_summary, monthly_summary_export, overview_snapshot,
+)
+from finsight.schema import expand_months
+from finsight.trends import MonthlyStats
+
+STATEMENT_SUFFIXES = (".csv", ".xlsx", ".xls", ".pdf")
+DEFAULT_CONTAMINATION = 0.05
+DEFAULT_CLUSTERS = 3
+# "parse" and "classify" are recorded inside "load"
+STAGES = ["load", "parse", "classify", "categorize", "aggregate", "anomalies", "clusters", "export"]
+TIMINGS_FILE = "timings.csv"
+
+
+def collect_statements(inputs):
+    """Statement files among inputs; directories contribute their supported files, sorted."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            names = sorted(os.listdir(item))
+            paths.extend(os.path.join(item, n) for n in names if n.lower().endswith(STATEMENT_SUFFIXES))
+        else:
+            paths.append(item)
+    return paths
+
+
+def _write_excel(path, sheets):
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name[:31], index=False)
+
+
+def build_outputs(df, cube, year=None, contamination=DEFAULT_CONTAMINATION, n_clusters=DEFAULT_CLUSTERS,
+                  ml=True, profiler=None):
+    """The dashboard's export tables for a loaded ledger and its cube, keyed by file name."""
+    profiler = profiler or NULL_PROFILER
+    with profiler.stage("aggregate"):
+        df_view = df if year is None else df[df["year"] == year]
+        cube_view = slice_year(cube, year)
+        year_label = "All" if year is None else year
+        txn_view = expand_months(df_view)
+
+        metrics = headline_metrics(cube, year)
+        outputs = {
+            "overview_snapshot.csv": overview_snapshot(metrics),
+            "category_totals.csv": net_by(cube_view, "category").reset_index(),
+            "monthly_summary.csv": monthly_summary_export(
+                monthly_summary(metrics["monthly_income"], metrics["monthly_expense"])
+            ),
+            "insights_table.csv": insights_table(metrics, year_label),
+            "monthly_trends.csv": MonthlyStats.from_cube(cube).rolling(year).reset_index(),
+            "recurring_payments.csv": detect_recurring(df),
+            "cashflow_forecast.csv": forecast_categories(cube, DEFAULT_HORIZON),
+            "transactions.csv": txn_view,
+            "transactions.xlsx": {"transactions": txn_view},
+        }
+    if not ml:
+        return outputs
+
+    with profiler.stage("anomalies"):
+        if len(df_view) >= ANOMALY_MIN_ROWS:
+            raw = AnomalyModel(use_abs=True).fit(df_view)
+            outputs["anomalies.csv"] = anomaly_table(label_anomalies(txn_view, raw, contamination))
+
+    with profiler.stage("clusters"):
+        if len(df_view) >= n_clusters:
+            clusterer = TransactionClusterer(txn_view)
+            outputs["clustered_transactions.csv"] = clusterer.frame.assign(cluster=clusterer.labels(n_clusters))
+        month_tot = cluster_months(cube_view, n_clusters) if not cube_view.empty else None
+        if month_tot is not None:
+            outputs["monthly_clusters.csv"] = month_tot
+    return outputs
+
+
+def write_outputs(outputs, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, table in outputs.items():
+        path = os.path.join(out_dir, name)
+        if name.endswith(".xlsx"):
+            _write_excel(path, table)
+        else:
+            table.to_csv(path, index=False)
+
+
+def run_statement(path, out_dir, year=None, contamination=DEFAULT_CONTAMINATION, n_clusters=DEFAULT_CLUSTERS,
+                  ml=True, compact=True, pdf_workers=None, predict_categories=False, categorizer=""):
+    """Run the full pipeline on one statement and write its exports into out_dir.
+
+    With ``predict_categories``, uncategorized rows get categories learned from the
+    statement's categorized rows, or from the saved CategoryModel at ``categorizer``
+    when it has too few.
+    Returns a timings record: file, output dir, row count and seconds per stage.
+    """
+    start = time.perf_counter()
+    profiler = StageProfiler()
+    profiler.start_run()
+    with profiler.stage("load"):
+        df = load_ledger(path, compact=compact, pdf_workers=pdf_workers, profiler=profiler)
+    with profiler.stage("categorize"):
+        if predict_categories and unlabelled_mask(df["category"]).any():
+            df, _ = categorize(df, train_categorizer(df) or CategoryModel.load(categorizer))
+    with profiler.stage("aggregate"):
+        cube = build_cube(df)
+    outputs = build_outputs(df, cube, year, contamination, n_clusters, ml, profiler)
+    with profiler.stage("export"):
+        write_outputs(outputs, out_dir)
+
+    seconds = profiler.run_seconds()
+    record = {"file": path, "output": out_dir, "status": "ok", "rows": len(df)}
+    record.update({f"{stage}_s": round(seconds.get(stage, 0.0), 4) for stage in STAGES})
+    record["total_s"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def _run_safely(path, out_dir, options):
+    start = time.perf_counter()
+    try:
+        return run_statement(path, out_dir, **options)
+    except Exception as e:
+        return {"file": path, "output": out_dir, "status": f"error: {e}", "rows": 0,
+                "total_s": round(time.perf_counter() - start, 4)}
+
+
+def _output_dirs(paths, out_root):
+    # one folder per statement, named after the file; the extension is kept only when stems collide
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    dirs = []
+    for path, stem in zip(paths, stems):
+        name = stem if stems.count(stem) == 1 else os.path.basename(path).replace(".", "_")
+        dirs.append(os.path.join(out_root, name))
+    return dirs
+
+
+def run_batch(paths, out_root, workers=None, progress=None, **options):
+    """Run run_statement over many files, one worker process per file at a time.
+
+    Failures are recorded in the timings instead of aborting the batch. Writes
+    ``timings.csv`` into out_root and returns the records in input order.
+    ``progress(record)`` is called as each file finishes.
+    """
+    os.makedirs(out_root, exist_ok=True)
+    jobs = list(zip(paths, _output_dirs(paths, out_root)))
+    workers = max(1, min(workers or available_cpus(), len(jobs) or 1))
+
+    records = [None] * len(jobs)
+    if workers == 1:
+        # a single worker leaves the PDF extractor free to use every CPU
+        for i, (path, out_dir) in enumerate(jobs):
+            records[i] = _run_safely(path, out_dir, options)
+            if progress is not None:
+                progress(records[i])
+    else:
+        # files are already spread over the cores; keep PDF extraction inside each worker
+        options = {**options, "pdf_workers": 1}
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = {pool.submit(_run_safely, path, out_dir, options): i for i, (path, out_dir) in enumerate(jobs)}
+            for future in as_completed(futures):
+                records[futures[future]] = future.result()
+                if progress is not None:
+                    progress(records[futures[future]])
+
+    columns = ["file", "output", "status", "rows"] + [f"{stage}_s" for stage in STAGES] + ["total_s"]
+    pd.DataFrame(records).reindex(columns=columns).to_csv(os.path.join(out_root, TIMINGS_FILE), index=False)
+    return records
@@ -0,0 +1,154 @@
+"""Lightweight per-stage profiler: timing context managers with cumulative counters.
+
+    profiler = StageProfiler()
+    profiler.start_run()
+    with profiler.stage("parse"):
+        ...
+
+Each ``start_run()`` begins a new run (one dashboard rerun or one batch file).
+Stages entered several times in a run, or nested inside each other, are all
+recorded; counters accumulate across runs. With ``trace_memory`` on, the
+tracemalloc peak above the stage's starting point is recorded as well (nested
+stages are accounted to their parents too).
+"""
+import json
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+HISTORY_RUNS = 50
+MB = 2**20
+
+
+class StageProfiler:
+    def __init__(self, trace_memory=False, enabled=True, history=HISTORY_RUNS):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.context = {}
+        self.runs = 0
+        self.totals = OrderedDict()
+        self.history = deque(maxlen=history)
+        self.last_run = OrderedDict()
+        self._current = None
+        self._stack = []
+        self._started_tracing = False
+
+    # -------- runs --------
+    def start_run(self):
+        """Close the current run (if any) and begin a new one."""
+        self.end_run()
+        self._current = OrderedDict()
+        self._sync_tracing()
+
+    def end_run(self):
+        if self._current is None:
+            return
+        self.runs += 1
+        self.last_run = self._current
+        self.history.append({"run": self.runs, "stages": dict(self._current)})
+        self._current = None
+
+    def _sync_tracing(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        elif not self.trace_memory and self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    # -------- stages --------
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        frame = {"start_mem": 0, "peak": 0}
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            for parent in self._stack:
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["start_mem"] = frame["peak"] = current
+        self._stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self._stack.pop()
+            peak_mb = None
+            if tracing and tracemalloc.is_tracing():
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+                peak_mb = (peak - frame["start_mem"]) / MB
+            self._record(name, seconds, peak_mb)
+
+    def _record(self, name, seconds, peak_mb):
+        if self._current is None:
+            self._current = OrderedDict()
+        run = self._current.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_mb": None})
+        run["calls"] += 1
+        run["seconds"] += seconds
+        if peak_mb is not None:
+            run["peak_mb"] = max(run["peak_mb"] or 0.0, peak_mb)
+
+        total = self.totals.setdefault(name, {"runs": 0, "calls": 0, "total_s": 0.0, "max_s": 0.0,
+                                              "last_s": 0.0, "peak_mb": None, "_run": None})
+        if total["_run"] != self.runs:
+            # first call of this stage in the current run
+            total["runs"] += 1
+            total["_run"] = self.runs
+            total["last_s"] = 0.0
+        total["calls"] += 1
+        total["total_s"] += seconds
+        total["last_s"] += seconds
+        total["max_s"] = max(total["max_s"], total["last_s"])
+        if peak_mb is not None:
+            total["peak_mb"] = max(total["peak_mb"] or 0.0, peak_mb)
+
+    # -------- reporting --------
+    def run_seconds(self, run=None):
+        """{stage: seconds} for a run (default: the current run, else the last finished one)."""
+        run = run if run is not None else (self._current if self._current else self.last_run)
+        return {name: s["seconds"] for name, s in run.items()}
+
+    def last_run_table(self):
+        run = self._current if self._current else self.last_run
+        df = pd.DataFrame.from_dict(run, orient="index", columns=["calls", "seconds", "peak_mb"])
+        return df.rename_axis("stage").reset_index().round(4)
+
+    def totals_table(self):
+        df = pd.DataFrame.from_dict(self.totals, orient="index",
+                                    columns=["runs", "calls", "total_s", "max_s", "last_s", "peak_mb"])
+        if not df.empty:
+            df.insert(3, "mean_s", df["total_s"] / df["runs"])
+        return df.rename_axis("stage").reset_index().round(4)
+
+    def to_dict(self):
+        totals = {name: {k: v for k, v in t.items() if not k.startswith("_")} for name, t in self.totals.items()}
+        return {
+            "context": self.context,
+            "runs": self.runs,
+            "trace_memory": self.trace_memory,
+            "current_run": dict(self._current or self.last_run),
+            "totals": totals,
+            "history": list(self.history),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def reset(self):
+        self.runs = 0
+        self.totals.clear()
+        self.history.clear()
+        self.last_run = OrderedDict()
+        self._current = OrderedDict() if self._current is not None else None
+
+
+NULL_PROFILER = StageProfiler(enabled=False)
@@ -0,0 +1,154 @@
+"""Recurring-payment detection (rent, EMIs, subscriptions) over a whole ledger.
+
+Debits are grouped by normalized merchant (the description without digits,
+reference numbers and punctuation) and amount band (a merchant's amounts,
+sorted, start a new band wherever one exceeds the previous by more than 15%,
+so small variations in an EMI or a bill never split it). One sort by
+(group, date) then lines every group's
+payments up, so the gaps between consecutive payments, each group's median
+gap and the share of gaps close to it are computed for all groups at once.
+Groups whose median gap matches a known cadence (weekly ... yearly) and whose
+gaps mostly agree with it are reported as recurring streams, with the date
+the next payment is expected.
+"""
+import numpy as np
+import pandas as pd
+
+CADENCES = {"Weekly": 7, "Fortnightly": 14, "Monthly": 30.44, "Quarterly": 91.31, "Half-yearly": 182.62, "Yearly": 365.25}
+CADENCE_TOLERANCE = 0.15  # share of the period a gap may be off by (at least MIN_TOLERANCE_DAYS)
+MIN_TOLERANCE_DAYS = 2
+MIN_OCCURRENCES = 3
+MIN_REGULARITY = 0.6  # share of a stream's gaps within tolerance of its cadence
+AMOUNT_BAND_RATIO = 1.15  # a jump of more than this between sorted amounts starts a new band
+RECURRING_COLUMNS = [
+    "merchant", "description", "category", "cadence", "every_days", "amount", "monthly_cost",
+    "occurrences", "regularity", "first_date", "last_date", "next_expected", "active",
+]
+
+
+def merchant_keys(values):
+    """Normalized merchant per description: case-folded, digits and punctuation dropped.
+
+    Letters of any script are kept ("Café X", "食品店"); a description without any
+    comes out empty.
+    """
+    return (
+        values.astype(str).str.casefold()
+        .str.replace(r"[\W\d_]+", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _merchant_codes(descriptions):
+    """(codes, merchant names) with the normalization done once per distinct description."""
+    if isinstance(descriptions.dtype, pd.CategoricalDtype):
+        codes, uniques = descriptions.cat.codes.to_numpy(), descriptions.cat.categories.to_series()
+    else:
+        codes, uniques = pd.factorize(descriptions)
+        uniques = pd.Series(uniques)
+    keys = merchant_keys(uniques).to_numpy(dtype=object)
+    merchant_codes, merchants = pd.factorize(keys)
+    merchant_codes[keys == ""] = -1  # nothing but digits/punctuation: no merchant to group by
+    return np.where(codes >= 0, merchant_codes[codes], -1), merchants
+
+
+def _to_dates(days):
+    return pd.to_datetime(days.astype("datetime64[D]"))
+
+
+def _group_offsets(groups):
+    """Start offsets of each run of equal values in a sorted group array."""
+    return np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+
+def detect_recurring(df, as_of=None):
+    """Recurring debit streams in df (date, description, actual_amount, category), most expensive first.
+
+    as_of (default: the ledger's last date) decides which streams are still
+    active: those whose next payment is due no more than one period before it.
+    """
+    merchant_codes, merchants = _merchant_codes(df["description"])
+    amounts = df["actual_amount"].to_numpy()
+    rows = np.flatnonzero((amounts < 0) & (merchant_codes >= 0))
+    if len(rows) < MIN_OCCURRENCES:
+        return pd.DataFrame(columns=RECURRING_COLUMNS)
+    merchant = merchant_codes[rows]
+    amount = -amounts[rows]
+
+    # amount bands: sorted by (merchant, amount), a new band starts at each merchant or large jump
+    cents = np.round(amount * 100).astype(np.int64)
+    by_amount = np.argsort(merchant.astype(np.int64) << 40 | cents)
+    sorted_merchant, sorted_amount = merchant[by_amount], amount[by_amount]
+    new_band = np.r_[True, (sorted_merchant[1:] != sorted_merchant[:-1])
+                     | (sorted_amount[1:] > sorted_amount[:-1] * AMOUNT_BAND_RATIO)]
+    group = np.empty(len(rows), dtype=np.int64)
+    group[by_amount] = np.cumsum(new_band)
+
+    # a second sort lines up every group's payments by date
+    days = df["date"].to_numpy().astype("datetime64[D]").astype(np.int64)[rows]
+    order = np.argsort(group << 32 | (days - days.min()))
+    group, days, amount, rows = group[order], days[order], amount[order], rows[order]
+    # several payments to one merchant on one day count once
+    first_of_day = np.r_[True, (group[1:] != group[:-1]) | (days[1:] != days[:-1])]
+    group, days, amount, rows = group[first_of_day], days[first_of_day], amount[first_of_day], rows[first_of_day]
+    if not len(group):
+        return pd.DataFrame(columns=RECURRING_COLUMNS)
+
+    starts = _group_offsets(group)
+    occurrences = np.diff(np.r_[starts, len(group)])
+    candidate = occurrences >= MIN_OCCURRENCES
+    group_of_row = np.repeat(np.arange(len(starts)), occurrences)
+
+    # gaps between consecutive payments of a group, and each group's median gap
+    same_group = np.r_[False, group[1:] == group[:-1]]
+    gaps = np.diff(days, prepend=days[0])[same_group].astype(float)
+    gap_group = group_of_row[same_group]
+    gap_order = np.lexsort((gaps, gap_group))
+    n_gaps = occurrences - 1
+    gap_starts = np.r_[0, np.cumsum(n_gaps)[:-1]]
+    median_gap = np.full(len(starts), np.nan)
+    has_gaps = n_gaps > 0
+    lower = gaps[gap_order][gap_starts[has_gaps] + (n_gaps[has_gaps] - 1) // 2]
+    upper = gaps[gap_order][gap_starts[has_gaps] + n_gaps[has_gaps] // 2]
+    median_gap[has_gaps] = (lower + upper) / 2
+
+    # nearest known cadence to each median gap, and the share of gaps within tolerance of it
+    periods = np.array(list(CADENCES.values()))
+    nearest = np.abs(median_gap[:, None] - periods[None, :]).argmin(axis=1)
+    period = periods[nearest]
+    tolerance = np.maximum(MIN_TOLERANCE_DAYS, CADENCE_TOLERANCE * period)
+    matches_cadence = np.abs(median_gap - period) <= tolerance
+    on_time = np.abs(gaps - period[gap_group]) <= tolerance[gap_group]
+    regularity = np.bincount(gap_group, weights=on_time, minlength=len(starts)) / np.maximum(n_gaps, 1)
+    recurring = candidate & matches_cadence & (regularity >= MIN_REGULARITY)
+    if not recurring.any():
+        return pd.DataFrame(columns=RECURRING_COLUMNS)
+
+    ends = np.r_[starts[1:], len(group)] - 1
+    last_row = rows[ends]
+    mean_amount = np.bincount(group_of_row, weights=amount) / occurrences
+    sel = np.flatnonzero(recurring)
+    every_days = np.zeros(len(starts), dtype=np.int64)
+    every_days[sel] = np.round(median_gap[sel])
+    last_day = days[ends]
+    next_day = last_day + every_days
+    as_of = pd.Timestamp(as_of) if as_of is not None else df["date"].max()
+    as_of_day = as_of.to_datetime64().astype("datetime64[D]").astype(np.int64)
+
+    streams = pd.DataFrame({
+        "merchant": np.asarray(merchants, dtype=object)[merchant_codes[last_row[sel]]],
+        "description": df["description"].iloc[last_row[sel]].to_numpy(dtype=object),
+        "category": df["category"].iloc[last_row[sel]].astype(str).to_numpy() if "category" in df.columns else "",
+        "cadence": np.asarray(list(CADENCES), dtype=object)[nearest[sel]],
+        "every_days": every_days[sel],
+        "amount": mean_amount[sel].round(2),
+        "monthly_cost": (mean_amount[sel] * CADENCES["Monthly"] / median_gap[sel]).round(2),
+        "occurrences": occurrences[sel],
+        "regularity": regularity[sel].round(2),
+        "first_date": _to_dates(days[starts[sel]]),
+        "last_date": _to_dates(last_day[sel]),
+        "next_expected": _to_dates(next_day[sel]),
+        "active": next_day[sel] + every_days[sel] >= as_of_day,
+    })
+    return streams.sort_values(["active", "monthly_cost"], ascending=[False, False], ignore_index=True)
@@ -0,0 +1,116 @@
+"""Headline metrics and summary tables shared by the dashboard and batch runs."""
+import pandas as pd
+
+from finsight.aggregates import income_expense_by, income_expense_totals, net_by, slice_year
+
+
+def pct_change_str(curr, prev):
+    try:
+        if prev == 0:
+            return "N/A"
+        return f"{round(((curr - prev) / prev) * 100, 2)}%"
+    except Exception:
+        return "N/A"
+
+
+def headline_metrics(cube, year=None):
+    """Overview / AI Insights figures for the cube, optionally filtered to one year.
+
+    Monthly and category figures follow the year filter; the YTD/YoY figures
+    come from the full (all-years) cube.
+    """
+    cube_view = slice_year(cube, year)
+    income, expense = income_expense_totals(cube_view)
+    monthly_income, monthly_expense = income_expense_by(cube_view, "month")
+    monthly_savings = monthly_income - monthly_expense
+    months = monthly_income.index.tolist()
+
+    if len(months) == 0:
+        current_month, previous_month = "N/A", None
+        current_month_net, previous_month_net = 0, 0
+    else:
+        current_month = months[-1]
+        previous_month = months[-2] if len(months) > 1 else None
+        current_month_net = monthly_savings.loc[current_month]
+        previous_month_net = monthly_savings.loc[previous_month] if previous_month is not None else 0
+
+    yearly_income, yearly_expense = income_expense_by(cube, "year")
+    yearly_net = yearly_income - yearly_expense
+    if year is not None:
+        ytd_net = yearly_net.get(year, 0)
+        ytd_yoy = pct_change_str(ytd_net, yearly_net.get(year - 1, 0))
+    else:
+        ytd_net = yearly_net.sum() if len(yearly_net) > 0 else 0
+        ytd_yoy = "N/A"
+
+    cat_full = net_by(cube_view, ["month", "category"]).reset_index()
+    total_by_cat = cat_full.groupby("category")["actual_amount"].sum().sort_values(ascending=False)
+    top_category = total_by_cat.index[0] if len(total_by_cat) > 0 else "N/A"
+    top_cat_total = total_by_cat.iloc[0] if len(total_by_cat) > 0 else 0
+    months_with_top_cat = cat_full[cat_full["category"] == top_category].sort_values(by="actual_amount", ascending=False)
+    top_month_for_cat = months_with_top_cat.iloc[0]["month"] if not months_with_top_cat.empty else "N/A"
+
+    return {
+        "income": income,
+        "expense": expense,
+        "net": income - expense,
+        "monthly_income": monthly_income,
+        "monthly_expense": monthly_expense,
+        "monthly_savings": monthly_savings,
+        "months": months,
+        "current_month": current_month,
+        "previous_month": previous_month,
+        "current_month_net": current_month_net,
+        "previous_month_net": previous_month_net,
+        "mom_change": pct_change_str(current_month_net, previous_month_net) if previous_month is not None else "N/A",
+        "yearly_income": yearly_income,
+        "yearly_expense": yearly_expense,
+        "ytd_net": ytd_net,
+        "ytd_yoy": ytd_yoy,
+        "top_category": top_category,
+        "top_category_total": top_cat_total,
+        "top_category_peak_month": top_month_for_cat,
+        "transactions": int(cube_view["count"].sum()),
+    }
+
+
+def overview_snapshot(metrics):
+    return pd.DataFrame({
+        "metric": ["lifetime_net", "current_month_net", "ytd_net", "top_category"],
+        "value": [metrics["net"], metrics["current_month_net"], metrics["ytd_net"], metrics["top_category"]],
+    })
+
+
+def insights_table(metrics, year_label="All"):
+    previous_month = metrics["previous_month"]
+    return pd.DataFrame([
+        ["Current Month (net)", str(metrics["current_month"]), f"₹{metrics['current_month_net']:,.2f}"],
+        ["Previous Month (net)", str(previous_month) if previous_month is not None else "N/A", f"₹{metrics['previous_month_net']:,.2f}"],
+        ["Month-over-Month Change (savings)", "-", metrics["mom_change"]],
+        ["Selected Year (YTD net)", year_label, f"₹{metrics['ytd_net']:,.2f}"],
+        ["Year-over-Year Change (YTD)", "-", metrics["ytd_yoy"]],
+        ["Top Category (net)", metrics["top_category"], f"₹{metrics['top_category_total']:,.2f}"],
+        ["Peak Month for Top Category", str(metrics["top_category_peak_month"]), "-"],
+        ["Total Transactions (in view)", metrics["transactions"], "-"],
+    ], columns=["Insight", "Detail", "Value"])
+
+
+def monthly_summary(monthly_income, monthly_expense):
+    """Per-month expense/income/savings with month-over-month diffs and % changes."""
+    summary_df = pd.DataFrame({
+        "expense": monthly_expense,
+        "income": monthly_income,
+        "savings": monthly_income - monthly_expense,
+    })
+    summary_df["expense_diff"] = summary_df["expense"].diff().fillna(0)
+    summary_df["expense_pct_change"] = (summary_df["expense"].pct_change().fillna(0) * 100).round(2)
+    summary_df["savings_diff"] = summary_df["savings"].diff().fillna(0)
+    summary_df["savings_pct_change"] = (summary_df["savings"].pct_change().fillna(0) * 100).round(2)
+    return summary_df
+
+
+def monthly_summary_export(summary_df):
+    """The monthly summary as written by the CSV download (month as text)."""
+    display_df = summary_df.copy()
+    display_df.index = display_df.index.astype(str)
+    return display_df.reset_index()
@@ -0,0 +1,217 @@
+"""Process-wide result cache shared by every session of one server.
+
+Results (parsed ledgers, merged ledgers, year views, model scores) are keyed by
+tuples built from content hashes, so two analysts opening the same statement
+share one copy. The memory tier is an LRU bounded by the estimated size of its
+values, with an optional time-to-live; concurrent requests for a missing key
+compute it once while the others wait. Entries stored with ``persist=True``
+are also written to a disk tier (joblib files under ``cache_dir``) that
+survives server restarts and is read back on memory misses.
+
+Cached values are shared between sessions and must not be modified in place.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+RESULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+RESULT_CACHE_TTL_SECONDS = 6 * 3600
+RESULT_DISK_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def estimate_nbytes(value):
+    """Approximate memory held by value (frames, arrays, bytes and containers of them)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value) + sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values()) + sys.getsizeof(value)
+    if hasattr(value, "nbytes"):  # e.g. search indexes
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU/TTL cache of computed results with an optional disk tier."""
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES, ttl=RESULT_CACHE_TTL_SECONDS, cache_dir="",
+                 disk_max_bytes=RESULT_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "disk_writes": 0, "evictions": 0, "expired": 0}
+        self._items = OrderedDict()  # key -> (value, nbytes, stored_at)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._computing = {}  # key -> lock held while the key is being computed
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    # -------- memory tier --------
+    def _lookup(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self._expired(item[2]):
+                self._drop(key)
+                self.stats["expired"] += 1
+                item = None
+            if item is not None:
+                self._items.move_to_end(key)
+                self.stats["hits"] += 1
+                return item[0]
+        value = self._load(key)
+        with self._lock:
+            self.stats["disk_hits" if value is not None else "misses"] += 1
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def _expired(self, stored_at):
+        return bool(self.ttl) and time.time() - stored_at > self.ttl
+
+    def _drop(self, key):
+        _, nbytes, _ = self._items.pop(key)
+        self._nbytes -= nbytes
+
+    def _store(self, key, value, nbytes=None):
+        nbytes = estimate_nbytes(value) if nbytes is None else int(nbytes)
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (value, nbytes, time.time())
+            self._nbytes += nbytes
+            # evict least-recently-used entries, always keeping the newest one
+            while len(self._items) > 1 and self._nbytes > self.max_bytes:
+                self._drop(next(iter(self._items)))
+                self.stats["evictions"] += 1
+
+    def get(self, key):
+        """Cached value for key (memory, then disk), or None."""
+        return self._lookup(key)
+
+    def put(self, key, value, persist=False, nbytes=None):
+        """Store value under key (and on disk if persist); None values are not cached."""
+        if value is None:
+            return None
+        self._store(key, value, nbytes)
+        if persist:
+            self._save(key, value)
+        return value
+
+    def get_or_compute(self, key, compute, persist=False):
+        """Cached value for key, or compute() stored under it; one computation per key at a time."""
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._computing.setdefault(key, threading.Lock())
+        with key_lock:
+            # another session may have finished computing it while this one waited
+            with self._lock:
+                item = self._items.get(key)
+                if item is not None:
+                    self.stats["misses"] -= 1
+                    self.stats["hits"] += 1
+                    return item[0]
+            try:
+                return self.put(key, compute(), persist=persist)
+            finally:
+                with self._lock:
+                    self._computing.pop(key, None)
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+        path = self._path(key)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+    def metrics(self):
+        """Counters plus current size, for the diagnostics panel."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0
+            return dict(self.stats, entries=len(self._items), mb=round(self._nbytes / 2**20, 1),
+                        hit_rate=round(hit_rate, 3))
+
+    # -------- disk tier --------
+    def _path(self, key):
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"result-{digest}.joblib")
+
+    def _load(self, key):
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+            stored_key, value = joblib.load(path)
+        except Exception:
+            return None
+        return value if stored_key == key else None
+
+    def _save(self, key, value):
+        path = self._path(key)
+        if path is None:
+            return
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            joblib.dump((key, value), tmp)
+            os.replace(tmp, path)
+            with self._lock:
+                self.stats["disk_writes"] += 1
+            self._prune_disk()
+        except Exception:
+            # the disk tier is best-effort; the memory tier still holds the value
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _prune_disk(self):
+        # oldest files go first once the tier is over its budget
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("result-") and name.endswith(".joblib"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries)[:-1]:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,71 @@
+"""Compact in-memory transaction schema and memory reporting.
+
+The compact schema keeps the columns the dashboard needs at narrow dtypes:
+categorical ``category`` (and ``description`` when it repeats enough), int16
+``year`` and an int32 ``month`` ordinal (months since 1970-01, the same ordinal
+pandas uses for a monthly Period), and drops the ``desc_clean``/``cat_clean``
+helpers left by classification.
+"""
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+HELPER_COLUMNS = ["desc_clean", "cat_clean"]
+# descriptions become categorical when at most this share of them is distinct
+DESCRIPTION_MAX_UNIQUE_RATIO = 0.5
+
+
+def month_ordinals(dates):
+    """int32 month ordinal for a datetime Series."""
+    return ((dates.dt.year - 1970) * 12 + dates.dt.month - 1).astype("int32")
+
+
+def ordinals_to_periods(values):
+    return pd.PeriodIndex.from_ordinals(values, freq="M")
+
+
+def is_compact_month(month):
+    return not isinstance(month.dtype, pd.PeriodDtype)
+
+
+def compact_frame(df):
+    """Return df in the compact schema (helper columns dropped, narrow dtypes)."""
+    out = df.drop(columns=[c for c in HELPER_COLUMNS if c in df.columns])
+    out["category"] = out["category"].astype("category")
+    if len(out) and out["description"].nunique() <= DESCRIPTION_MAX_UNIQUE_RATIO * len(out):
+        out["description"] = out["description"].astype("category")
+    out["month"] = month_ordinals(out["date"])
+    out["year"] = out["year"].astype("int16")
+    return out
+
+
+def expand_months(df):
+    """Copy of df with a compact month ordinal turned back into a monthly Period (for display/export)."""
+    if "month" not in df.columns or not is_compact_month(df["month"]):
+        return df
+    out = df.copy()
+    out["month"] = ordinals_to_periods(out["month"].to_numpy())
+    return out
+
+
+def concat_columns(parts):
+    """Concatenate per-chunk Series of one column, unioning categoricals."""
+    if len(parts) == 1:
+        return parts[0]
+    categorical = [isinstance(p.dtype, pd.CategoricalDtype) for p in parts]
+    if all(categorical):
+        return pd.Series(union_categoricals(parts, ignore_order=True), name=parts[0].name)
+    if any(categorical):
+        # chunks disagreed on whether the column repeats enough; fall back to strings
+        parts = [p.astype(str) if c else p for p, c in zip(parts, categorical)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def memory_report(before, after):
+    """Per-column bytes/row of two frames holding the same rows, plus a total row."""
+    b = before.memory_usage(deep=True, index=False) / max(len(before), 1)
+    a = after.memory_usage(deep=True, index=False) / max(len(after), 1)
+    report = pd.DataFrame({"bytes_per_row_before": b, "bytes_per_row_after": a}).fillna(0)
+    report.loc["total"] = report.sum()
+    report["dtype_after"] = pd.Series({c: str(after[c].dtype) for c in after.columns}).reindex(report.index).fillna("dropped")
+    report.loc["total", "dtype_after"] = f"{report.loc['total', 'bytes_per_row_before'] / max(report.loc['total', 'bytes_per_row_after'], 1e-9):.1f}x smaller"
+    return report.round(2)
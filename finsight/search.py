@@ -0,0 +1,116 @@
+"""Inverted token index over transaction descriptions and categories.
+
+Text is lower-cased and split into runs of letters/digits. Rows sharing a
+(description, category) pair form one document, so the index is built over
+the distinct values only: each column keeps a sorted vocabulary whose postings
+list the distinct values holding the token, and documents map back to their
+rows. A query's terms match tokens by prefix ("amaz" finds "amazon"); a row
+matches when every term is found in its description or category.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLUMNS = ("description", "category")
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+# above this share of rows, gathering matches through the row -> document codes beats expanding postings
+DENSE_MATCH_RATIO = 0.125
+
+
+def tokenize(text):
+    """Lower-cased letter/digit runs of text."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _codes(values):
+    """(codes, distinct values) of a column; missing values get code -1."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories.astype(str)
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), pd.Index(uniques).astype(str)
+
+
+class _Postings:
+    """Sorted vocabulary of one column's tokens, each with the distinct values holding it."""
+
+    def __init__(self, uniques):
+        tokens = pd.Series(uniques.str.lower(), dtype=object).str.findall(TOKEN_PATTERN).explode().dropna()
+        token_codes, vocab = pd.factorize(tokens.to_numpy(dtype=object), sort=True)
+        order = np.argsort(token_codes, kind="stable")
+        self.size = len(uniques)
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.ids = tokens.index.to_numpy()[order].astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(token_codes, minlength=len(vocab)))])
+
+    def match(self, prefix):
+        """Boolean mask over the distinct values holding a token starting with prefix."""
+        lo, hi = np.searchsorted(self.vocab, [prefix, prefix + "\uffff"])
+        hit = np.zeros(self.size + 1, dtype=bool)  # last slot: missing values
+        hit[self.ids[self.offsets[lo]:self.offsets[hi]]] = True
+        return hit
+
+    @property
+    def nbytes(self):
+        return self.vocab.nbytes + self.ids.nbytes + self.offsets.nbytes
+
+
+class TokenIndex:
+    """Token index over a ledger's rows; search() returns matching row positions."""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        columns = [c for c in columns if c in df.columns]
+        self.n_rows = len(df)
+        combined = np.zeros(self.n_rows, dtype=np.int64)
+        field_codes, self.fields = [], []
+        for column in columns:
+            codes, uniques = _codes(df[column])
+            combined = combined * (len(uniques) + 1) + codes + 1
+            field_codes.append(codes)
+            self.fields.append(_Postings(uniques))
+        row_type = np.int32 if self.n_rows < 2**31 else np.int64
+        doc_codes, doc_keys = pd.factorize(combined)
+        self.doc_codes = doc_codes.astype(row_type)
+        # each document's code in every column, taken from its first row
+        first = np.zeros(len(doc_keys), dtype=np.int64)
+        first[self.doc_codes[::-1]] = np.arange(self.n_rows)[::-1]
+        self.doc_fields = [codes[first] for codes in field_codes]
+        # rows grouped by document, in row order within each
+        self.rows_by_doc = np.argsort(self.doc_codes, kind="stable").astype(row_type)
+        self.doc_sizes = np.bincount(self.doc_codes, minlength=len(doc_keys))
+        self.doc_offsets = np.concatenate([[0], np.cumsum(self.doc_sizes)[:-1]])
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def nbytes(self):
+        arrays = [self.doc_codes, self.rows_by_doc, self.doc_sizes, self.doc_offsets] + self.doc_fields
+        return sum(a.nbytes for a in arrays) + sum(f.nbytes for f in self.fields)
+
+    def match_documents(self, query):
+        """Boolean mask over documents matching every term of query, or None for an empty query."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        docs = np.ones(len(self.doc_sizes), dtype=bool)
+        for term in dict.fromkeys(terms):
+            term_docs = np.zeros(len(docs), dtype=bool)
+            for postings, codes in zip(self.fields, self.doc_fields):
+                term_docs |= postings.match(term)[codes]  # code -1 reads the missing-value slot
+            docs &= term_docs
+        return docs
+
+    def search(self, query):
+        """Sorted positions of rows matching every term of query (all rows for an empty query)."""
+        docs = self.match_documents(query)
+        if docs is None:
+            return np.arange(self.n_rows)
+        hit = np.flatnonzero(docs)
+        sizes = self.doc_sizes[hit]
+        total = int(sizes.sum())
+        if total > DENSE_MATCH_RATIO * self.n_rows:
+            return np.flatnonzero(docs[self.doc_codes])
+        # the matching documents' slices of rows_by_doc, concatenated
+        starts = np.repeat(self.doc_offsets[hit] - (np.cumsum(sizes) - sizes), sizes)
+        return np.sort(self.rows_by_doc[starts + np.arange(total)])
@@ -0,0 +1,189 @@
+"""Persisted, year/month-partitioned Parquet ledger store.
+
+Layout of a store directory::
+
+    manifest.json                      parts, rows per partition, column layout
+    cube.parquet                       the (year, month, category, sign) aggregate cube
+    year=2024/month=03/<part>.parquet  the transactions of one upload for one month
+
+Uploads append into a store as named parts. Year and month filters read only
+the matching partition files (memory-mapped), so a multi-year history can be
+browsed one year at a time without loading the rest. Each row keeps its
+position in the original ledger, so a read returns rows in ledger order with
+the same index labels as filtering the in-memory frame.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+from finsight.schema import is_compact_month
+
+STORE_SCHEMA = 1  # bump when the partition layout changes
+MANIFEST = "manifest.json"
+CUBE_FILE = "cube.parquet"
+ROW_COLUMN = "_row"
+
+
+def _partition_dir(year, month):
+    return f"year={int(year)}/month={int(month):02d}"
+
+
+def _replace_atomic(write, path):
+    tmp = path + ".tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class LedgerStore:
+    """One ledger persisted as year/month Parquet partitions under root."""
+
+    def __init__(self, root):
+        self.root = root
+        self._manifest = None
+
+    # -------- manifest --------
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            path = os.path.join(self.root, MANIFEST)
+            try:
+                with open(path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+            if not manifest or manifest.get("schema") != STORE_SCHEMA:
+                manifest = {"schema": STORE_SCHEMA, "parts": {}, "partitions": {}, "period_month": False}
+            self._manifest = manifest
+        return self._manifest
+
+    def _save_manifest(self):
+        def write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+        _replace_atomic(write, os.path.join(self.root, MANIFEST))
+
+    def exists(self):
+        """True once at least one part has been committed."""
+        return ARROW_AVAILABLE and bool(self.manifest["parts"])
+
+    def has_part(self, part):
+        return part in self.manifest["parts"]
+
+    def years(self):
+        return sorted({int(p.split("/")[0][len("year="):]) for p in self.manifest["partitions"]})
+
+    def months(self, year=None):
+        """(year, month) pairs present in the store, optionally for one year."""
+        pairs = sorted(
+            (int(y[len("year="):]), int(m[len("month="):]))
+            for y, m in (p.split("/") for p in self.manifest["partitions"])
+        )
+        return [ym for ym in pairs if year is None or ym[0] == year]
+
+    def rows(self, year=None):
+        return sum(
+            n for p, parts in self.manifest["partitions"].items()
+            for n in parts.values()
+            if year is None or p.startswith(f"year={int(year)}/")
+        )
+
+    # -------- writing --------
+    def append(self, df, part="part-0"):
+        """Write df as part into its year/month partitions, then commit it to the manifest.
+
+        Rows are numbered after those already in the store, so reads keep
+        upload order. Appending a part that already exists is a no-op.
+        """
+        if not ARROW_AVAILABLE or self.has_part(part) or df.empty:
+            return False
+        manifest = self.manifest
+        period_month = "month" in df.columns and not is_compact_month(df["month"])
+        if manifest["parts"] and manifest["period_month"] != period_month:
+            raise ValueError("cannot mix compact and Period month columns in one ledger store")
+        out = df.drop(columns=["month"]) if period_month else df
+        # categoricals are written as strings: Parquet dictionary-encodes each file with only
+        # the values it holds, instead of every file carrying the ledger-wide categories
+        categorical = [c for c in out.columns if isinstance(out[c].dtype, pd.CategoricalDtype)]
+        start = sum(manifest["parts"].values())
+        table = pa.Table.from_pandas(
+            out.reset_index(drop=True)
+            .astype({c: str for c in categorical})
+            .assign(**{ROW_COLUMN: np.arange(start, start + len(df), dtype=np.int64)}),
+            preserve_index=False,
+        )
+
+        # one stable sort groups the rows by (year, month) and keeps ledger order inside each
+        keys = df["date"].dt.year.to_numpy().astype(np.int64) * 12 + df["date"].dt.month.to_numpy() - 1
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        for rows in np.split(order, bounds):
+            year, month = divmod(int(keys[rows[0]]), 12)
+            partition = _partition_dir(year, month + 1)
+            os.makedirs(os.path.join(self.root, partition), exist_ok=True)
+            chunk = table.take(pa.array(rows))
+            _replace_atomic(lambda tmp: pq.write_table(chunk, tmp), os.path.join(self.root, partition, f"{part}.parquet"))
+            manifest["partitions"].setdefault(partition, {})[part] = len(rows)
+
+        manifest["parts"][part] = len(df)
+        manifest["period_month"] = period_month
+        manifest["categorical"] = sorted(set(manifest.get("categorical", [])) | set(categorical))
+        manifest["columns"] = list(df.columns)
+        self._save_manifest()
+        return True
+
+    def write_cube(self, cube):
+        os.makedirs(self.root, exist_ok=True)
+        _replace_atomic(lambda tmp: cube.to_parquet(tmp, index=False), os.path.join(self.root, CUBE_FILE))
+
+    # -------- reading --------
+    def read_cube(self):
+        path = os.path.join(self.root, CUBE_FILE)
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def read(self, year=None, months=None, columns=None):
+        """Transactions for year (all years if None) and, optionally, months (1-12) of it.
+
+        Only the matching partition files are opened; columns limits what is
+        read from them. Rows come back in ledger order.
+        """
+        manifest = self.manifest
+        paths = [
+            os.path.join(self.root, _partition_dir(y, m), f"{part}.parquet")
+            for y, m in self.months(year)
+            if months is None or m in months
+            for part in manifest["partitions"][_partition_dir(y, m)]
+        ]
+        wanted = None
+        if columns is not None:
+            wanted = [c for c in columns if c != "month" or not manifest["period_month"]] + [ROW_COLUMN]
+            if manifest["period_month"] and "month" in columns and "date" not in wanted:
+                wanted.append("date")
+        if not paths:
+            return pd.DataFrame(columns=list(columns or manifest.get("columns", [])))
+
+        categorical = [c for c in manifest.get("categorical", []) if wanted is None or c in wanted]
+        tables = [pq.read_table(p, columns=wanted, memory_map=True, read_dictionary=categorical) for p in paths]
+        table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        df = table.to_pandas(split_blocks=True)
+        for c in categorical:
+            df[c] = df[c].cat.reorder_categories(sorted(df[c].cat.categories))
+        rows = df.pop(ROW_COLUMN).to_numpy()
+        df.index = pd.Index(rows)
+        if len(paths) > 1 and not df.index.is_monotonic_increasing:
+            df = df.iloc[np.argsort(rows, kind="stable")]
+        if manifest["period_month"] and (columns is None or "month" in columns):
+            df["month"] = df["date"].dt.to_period("M")
+        return df[list(columns) if columns is not None else manifest["columns"]]
@@ -0,0 +1,63 @@
+"""Paged, searchable Transactions table over a pre-sorted row order.
+
+The newest-first order is computed once per dataset view; searches (through
+the view's token index, fetched on the first query) and category filters
+return row positions in that order, and only the requested page is
+materialized for display. Query words match description/category tokens by
+prefix, not as substrings: "amaz" finds "Amazon Pay", "pay" does not find
+"Swiggy Repayment" (see finsight.search).
+"""
+import numpy as np
+
+from finsight.schema import expand_months
+from finsight.search import TokenIndex
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+
+class TransactionTable:
+    """Date-descending view of a ledger with server-side search, filter and paging."""
+
+    def __init__(self, df, search_index=None):
+        """search_index: callable returning the TokenIndex over df's rows (e.g. from a shared
+        cache); without it, one is built on the first query."""
+        self.df = df.reset_index(drop=True)
+        # same ordering as sort_values(by="date", ascending=False) on the frame
+        self.order = self.df["date"].sort_values(ascending=False).index.to_numpy()
+        self.categories = sorted(self.df["category"].astype(str).unique().tolist())
+        self._search_index = search_index or (lambda: TokenIndex(self.df))
+        self._index = None
+        self._last = None
+
+    def __len__(self):
+        return len(self.df)
+
+    def filter(self, query="", categories=()):
+        """Row positions (newest first) matching every word of query and in a selected category.
+
+        Words match description/category tokens by prefix (see finsight.search).
+        """
+        query = (query or "").strip()
+        key = (query.lower(), tuple(sorted(categories)))
+        if self._last is not None and self._last[0] == key:
+            return self._last[1]
+        mask = np.ones(len(self.df), dtype=bool)
+        if query:
+            if self._index is None:
+                self._index = self._search_index()
+            mask[:] = False
+            mask[self._index.search(query)] = True
+        if categories:
+            mask &= self.df["category"].astype(str).isin(list(categories)).to_numpy()
+        rows = self.order if mask.all() else self.order[mask[self.order]]
+        self._last = (key, rows)
+        return rows
+
+    def page(self, rows, page, page_size):
+        """Display frame for 1-based page of rows."""
+        start = (page - 1) * page_size
+        return expand_months(self.df.iloc[rows[start:start + page_size]]).reset_index(drop=True)
+
+    def export_frame(self, rows):
+        """The selected rows in ledger order, for download."""
+        return expand_months(self.df.iloc[np.sort(rows)])
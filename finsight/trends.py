@@ -0,0 +1,113 @@
+"""Streaming monthly statistics: per-month / per-category aggregates and rolling trends.
+
+MonthlyStats keeps one running cell per (year, month, category, sign), holding
+the count, sum, mean and m2 (sum of squared deviations) of its amounts. A batch
+(a statement's cube) is folded in cell by cell with the parallel form of
+Welford's update, so merged statistics equal those of one pass over every
+transaction.
+Monthly figures (income, expense, net, mean and spread of transaction amounts)
+and rolling 3/6/12-month moving averages and volatility are derived from the
+cells, so their cost depends on the number of months, not transactions.
+"""
+import numpy as np
+import pandas as pd
+
+from finsight.aggregates import CUBE_KEYS
+
+ROLLING_WINDOWS = (3, 6, 12)
+
+
+class MonthlyStats:
+    def __init__(self):
+        self._cells = {}  # (year, month, category, sign) -> [count, total, mean, m2]
+        self._cube = None  # cells as a cube frame, rebuilt after changes
+
+    def __len__(self):
+        return len(self._cells)
+
+    @classmethod
+    def from_cube(cls, cube):
+        stats = cls()
+        stats.merge_cube(cube)
+        return stats
+
+    # -------- updates --------
+    def merge_cube(self, cube):
+        """Fold in an aggregate cube (e.g. a newly loaded statement's) cell by cell."""
+        if cube is None or cube.empty:
+            return
+        columns = [cube[c].tolist() for c in CUBE_KEYS + ["count", "total", "m2"]]
+        for year, month, category, sign, count, total, m2 in zip(*columns):
+            key = (int(year), month, str(category), int(sign))
+            cell = self._cells.get(key)
+            mean = total / count
+            if cell is None:
+                self._cells[key] = [count, total, mean, m2]
+                continue
+            n = cell[0] + count
+            delta = mean - cell[2]
+            cell[3] += m2 + delta * delta * cell[0] * count / n
+            cell[2] += delta * count / n
+            cell[0] = n
+            cell[1] += total
+        self._cube = None
+
+    def cube(self):
+        """The cells as an aggregate cube (year, month, category, sign, total, count, m2)."""
+        if self._cube is None:
+            rows = [key + (total, count, m2) for key, (count, total, _, m2) in self._cells.items()]
+            cube = pd.DataFrame(rows, columns=CUBE_KEYS + ["total", "count", "m2"])
+            self._cube = cube.sort_values(CUBE_KEYS, ignore_index=True)
+        return self._cube
+
+    # -------- views --------
+    def monthly(self, year=None, category=None):
+        """Per-month income, expense, net, count and mean/std of transaction amounts.
+
+        Indexed by monthly Period over the months holding transactions,
+        optionally for one year and one category.
+        """
+        cells = self.cube()
+        if year is not None:
+            cells = cells[cells["year"] == year]
+        if category is not None:
+            cells = cells[cells["category"] == category]
+        grouped = cells.groupby("month", sort=True)
+        count = grouped["count"].sum()
+        net = grouped["total"].sum()
+        mean = net / count
+        # spread across a month's cells: their m2s plus each cell's squared distance from the month mean
+        month_mean = cells["month"].map(mean)
+        m2 = (cells["m2"] + cells["count"] * (cells["total"] / cells["count"] - month_mean) ** 2).groupby(cells["month"]).sum()
+        income = cells["total"].where(cells["sign"] > 0, 0).groupby(cells["month"]).sum()
+        expense = -cells["total"].where(cells["sign"] < 0, 0).groupby(cells["month"]).sum()
+        monthly = pd.DataFrame({
+            "income": income,
+            "expense": expense,
+            "net": net,
+            "count": count,
+            "mean": mean,
+            "std": np.sqrt(m2 / (count - 1)).where(count > 1),
+        })
+        monthly.index = pd.PeriodIndex(monthly.index, freq="M", name="month")
+        return monthly
+
+    def rolling(self, year=None, windows=ROLLING_WINDOWS, column="net", category=None):
+        """column per month with its moving average (ma_N) and volatility (vol_N, rolling std).
+
+        Windows run over consecutive calendar months (months without
+        transactions count as zero) and reach back across the year filter,
+        so January's 12-month average covers the previous year.
+        """
+        series = self.monthly(category=category)[column]
+        if series.empty:
+            return pd.DataFrame(columns=[column] + [f"{kind}_{w}" for w in windows for kind in ("ma", "vol")])
+        calendar = pd.period_range(series.index.min(), series.index.max(), freq="M", name="month")
+        series = series.reindex(calendar, fill_value=0)
+        trend = series.to_frame(column)
+        for w in windows:
+            window = series.rolling(w, min_periods=w)
+            trend[f"ma_{w}"] = window.mean()
+            trend[f"vol_{w}"] = window.std()
+        shown = self.monthly(year, category).index
+        return trend.loc[trend.index.isin(shown)]
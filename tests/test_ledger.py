@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from finsight.ingest import load_ledger
+from finsight.ledger import RunningLedger
+
+ROWS = [
+    ("2024-01-05", -250, "Swiggy order", "Food"),
+    ("2024-01-07", 50000, "Salary credit", "Income"),
+]
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=["date", "amount", "description", "category"]).to_csv(path, index=False)
+    return str(path)
+
+
+def test_int_amounts_dedup_against_float_amounts(tmp_path):
+    a = load_ledger(write_csv(tmp_path / "a.csv", ROWS))
+    b = load_ledger(write_csv(tmp_path / "b.csv", ROWS + [("2024-01-09", 12.50, "Tea", "Food")]))
+    assert a["amount"].dtype != b["amount"].dtype
+
+    ledger = RunningLedger()
+    ledger.add(a, "a")
+    stats = ledger.add(b, "b")
+
+    assert stats["added"] == 1 and stats["duplicates"] == 2
+    assert len(ledger) == 3
+
+
+def test_xlsx_dedups_against_csv(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["date", "amount", "description", "category"])
+    for date, amount, description, category in ROWS:
+        ws.append([pd.Timestamp(date).to_pydatetime(), amount, description, category])
+    wb.save(tmp_path / "a.xlsx")
+
+    ledger = RunningLedger()
+    ledger.add(load_ledger(str(tmp_path / "a.xlsx")), "a")
+    stats = ledger.add(load_ledger(write_csv(tmp_path / "b.csv", ROWS)), "b")
+
+    assert stats["added"] == 0 and stats["duplicates"] == 2
+    assert len(ledger) == 2
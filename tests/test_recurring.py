@@ -0,0 +1,9 @@
+import pandas as pd
+
+from finsight.recurring import merchant_keys
+
+
+def test_merchant_keys_keep_non_ascii_letters():
+    keys = merchant_keys(pd.Series(["Café X 1234", "CAFÉ X #99", "食品店 REF 42", "Cafe Y", "0042/17"]))
+
+    assert keys.tolist() == ["café x", "café x", "食品店 ref", "cafe y", ""]
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from finsight.search import TokenIndex
+from finsight.transactions import TransactionTable
+
+
+def make_ledger():
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-02"]),
+        "amount": [-499.0, -120.0, 25000.0],
+        "description": ["Amazon Pay order", "Swiggy Repayment", "Salary credit"],
+        "category": ["Shopping", "Food", "Income"],
+    })
+
+
+def test_search_matches_word_prefixes_not_substrings():
+    table = TransactionTable(make_ledger())
+
+    assert table.filter("amaz").tolist() == [0]
+    assert table.filter("repay").tolist() == [1]
+    assert table.filter("pay").tolist() == [0]  # "Repayment" holds "pay" mid-word only
+    assert table.filter("mazon").tolist() == []
+
+
+def test_search_uses_the_given_index():
+    df = make_ledger()
+    built = []
+
+    def shared_index():
+        built.append(TokenIndex(df))
+        return built[-1]
+
+    table = TransactionTable(df, search_index=shared_index)
+    assert table.filter("").tolist() == [1, 2, 0]
+    assert not built  # no query, no index
+
+    table.filter("salary")
+    table.filter("food")
+    assert len(built) == 1